@@ -0,0 +1,57 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Shared pytest configuration for the ModelZoo tests.
+
+`modelzoo/__init__.py` raises an ImportError if `cerebras_pytorch` isn't
+installed, and a few other package `__init__` files import modules that need
+it. Most of the data processing code doesn't, so when `cerebras_pytorch` is
+missing these packages are registered without running their `__init__` files.
+Modules that do need `cerebras_pytorch` still fail to import, and their tests
+are skipped with `pytest.importorskip("cerebras_pytorch")`.
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+
+# packages whose `__init__.py` needs `cerebras_pytorch` or the appliance
+_CEREBRAS_PACKAGES = [
+    "modelzoo",
+    "modelzoo.common",
+    "modelzoo.transformers.data_processing.h5_map_dataset",
+]
+
+
+def _register_package_without_init(name):
+    parent, _, child = name.rpartition(".")
+    if parent:
+        importlib.import_module(parent)
+    path = os.path.join(os.path.dirname(__file__), *name.split("."))
+    spec = importlib.util.spec_from_file_location(
+        name,
+        os.path.join(path, "__init__.py"),
+        submodule_search_locations=[path],
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    if parent:
+        setattr(sys.modules[parent], child, module)
+
+
+if importlib.util.find_spec("cerebras_pytorch") is None:
+    for name in _CEREBRAS_PACKAGES:
+        _register_package_without_init(name)
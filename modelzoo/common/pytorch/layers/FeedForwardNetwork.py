@@ -153,13 +153,14 @@ class FeedForwardNetwork(nn.Module):
             self.layers_dropout_rates = [None] * self.num_dense_layers
 
         # This sets the namespace of the layer.
-        # Using `nn.ModuleList` to have clear namespace such as
+        # Using `nn.Sequential` to have clear namespace such as
         # `ffn.{layer_num}.weight` and `ffn.{layer_num}.bias`
         # Class attributes cannot have `.` in their names when
         # inheriting from `nn.Module` and therefore cannot generate
-        # attribute names on the fly and hence the need to use ModuleList.
-        self.ffn = nn.ModuleList(
-            [
+        # attribute names on the fly and hence the need to use Sequential,
+        # which also chains the layers without a Python loop in `forward`.
+        self.ffn = nn.Sequential(
+            *[
                 SingleFeedForwardLayer(
                     in_features,
                     out_features,
@@ -184,13 +185,20 @@ class FeedForwardNetwork(nn.Module):
         self.__reset_parameters()
 
     def __reset_parameters(self):
+        # Build each initializer once rather than once per layer
+        kernel_initializer = create_initializer(self.kernel_initializer)
+        output_layer_initializer = create_initializer(
+            self.output_layer_initializer
+        )
+        bias_initializer = None
+        if self.use_bias:
+            bias_initializer = create_initializer(self.bias_initializer)
+
         # Initialize weights for Linear layers
         for layer_num, linear_layer_module in enumerate(self.ffn):
-            weight_initializer = create_initializer(self.kernel_initializer)
+            weight_initializer = kernel_initializer
             if layer_num == self.num_dense_layers - 1:
-                weight_initializer = create_initializer(
-                    self.output_layer_initializer
-                )
+                weight_initializer = output_layer_initializer
             # Initialize linear layer weights associated with the
             # 'GLU' type activation function with the kernel_initializer
             if hasattr(linear_layer_module, 'linear_layer_for_glu'):
@@ -198,14 +206,8 @@ class FeedForwardNetwork(nn.Module):
                     linear_layer_module.linear_layer_for_glu.weight.data
                 )
             weight_initializer(linear_layer_module.linear_layer.weight.data)
-            if self.use_bias:
-                create_initializer(self.bias_initializer)(
-                    linear_layer_module.linear_layer.bias.data
-                )
+            if bias_initializer is not None:
+                bias_initializer(linear_layer_module.linear_layer.bias.data)
 
     def forward(self, inputs):
-        outputs = inputs
-        for ffn_layer in self.ffn:
-            outputs = ffn_layer(outputs)
-
-        return outputs
+        return self.ffn(inputs)
@@ -72,25 +72,27 @@ class Converter_Falcon_40B_Attention_HF_CS20(
         if len(t.shape) == 4:
             to_rotate = t[:, :, :rotary_dim, :]
             to_pass = t[:, :, rotary_dim:, :]
-            to_rotate = (
+            interleaved = (
                 to_rotate.reshape(t.shape[0], t.shape[1], 2, -1, t.shape[-1])
                 .permute(0, 1, 3, 2, 4)
                 .reshape(t.shape[0], t.shape[1], -1, t.shape[-1])
             )
-            interleaved = torch.cat((to_rotate, to_pass), dim=2)
         elif len(t.shape) == 3:
             to_rotate = t[:, :, :rotary_dim]
             to_pass = t[:, :, rotary_dim:]
-            to_rotate = (
+            interleaved = (
                 to_rotate.reshape(t.shape[0], t.shape[1], 2, -1)
                 .permute(0, 1, 3, 2)
                 .reshape(t.shape[0], t.shape[1], -1)
             )
-            interleaved = torch.cat((to_rotate, to_pass), dim=2)
         else:
             assert (
                 False
             ), "shape of query, key, value projection tensor has to have shape of length 2 (biases) or 3 (weights) when converting from HF to CS"
+        # When the whole head is rotated (Falcon's default) there is nothing
+        # to pass through, so skip copying the result again with `torch.cat`.
+        if to_pass.shape[2] > 0:
+            interleaved = torch.cat((interleaved, to_pass), dim=2)
         return interleaved
 
     def reverse_interleave_helper(
@@ -105,7 +107,6 @@ class Converter_Falcon_40B_Attention_HF_CS20(
                 .permute(0, 1, 3, 2, 4)  # 2, 1, 3)
                 .reshape(num_groups, group_size, rotary_dim, t.shape[-1])
             )
-            reversed = torch.cat((reversed, to_pass), dim=2)
         elif len(t.shape) == 1:
             t = t.reshape(num_groups, group_size, -1)
             to_rotate = t[:, :, :rotary_dim]
@@ -115,11 +116,12 @@ class Converter_Falcon_40B_Attention_HF_CS20(
                 .permute(0, 1, 3, 2)
                 .reshape(num_groups, group_size, -1)
             )
-            reversed = torch.cat((reversed, to_pass), dim=2)
         else:
             assert (
                 False
             ), "shape of query, key, value projection tensor has to have shape of length 1 (biases) or 2 (weights) when converting from CS to HF"
+        if to_pass.shape[2] > 0:
+            reversed = torch.cat((reversed, to_pass), dim=2)
         return reversed
 
     def qkv_converter_hf_to_cs(
@@ -128,32 +130,34 @@ class Converter_Falcon_40B_Attention_HF_CS20(
         # HF represents Q, K, and V in a packed format (torch.Size(3*hidden, hidden)). We need to unpack the
         # weight and bias tensor for CS 1.7 format.
         q_key = new_key
-        k_key = re.sub("\.proj_q_dense_layer\.", ".proj_k_dense_layer.", q_key)
-        v_key = re.sub("\.proj_q_dense_layer\.", ".proj_v_dense_layer.", q_key)
+        # The Q projection name is a plain literal, so no regex is needed.
+        k_key = q_key.replace(".proj_q_dense_layer.", ".proj_k_dense_layer.")
+        v_key = q_key.replace(".proj_q_dense_layer.", ".proj_v_dense_layer.")
 
         hf_config = action_fn_args["configs"][0]
-        cs_config = action_fn_args["configs"][1]
-        hidden_size = cs_config["model"]["hidden_size"]
-        num_heads = cs_config["model"]["num_heads"]
+        cs_model_config = action_fn_args["configs"][1]["model"]
+        hidden_size = cs_model_config["hidden_size"]
+        num_heads = cs_model_config["num_heads"]
         head_size = hidden_size // num_heads
         num_kv_groups = hf_config["n_head_kv"]
         kv_group_size = num_heads // num_kv_groups
 
+        packed_qkv = old_state_dict[old_key]
         if new_key.endswith(".bias"):
-            assert len(old_state_dict[old_key].shape) == 1
-            packed_dim = old_state_dict[old_key].shape[0]
+            assert len(packed_qkv.shape) == 1
+            packed_dim = packed_qkv.shape[0]
             assert (
                 head_size * (num_kv_groups * 2 + num_heads) == packed_dim
             ), "Invalid tensor shape {} at {}.".format(
-                old_state_dict[old_key].shape, old_key
+                packed_qkv.shape, old_key
             )
-            split_by_num_heads = old_state_dict[old_key].reshape(
+            split_by_num_heads = packed_qkv.reshape(
                 num_kv_groups, (kv_group_size + 2), -1
             )
 
-            query = split_by_num_heads[:, :kv_group_size]
-            key = split_by_num_heads[:, kv_group_size : kv_group_size + 1]
-            value = split_by_num_heads[:, kv_group_size + 1 : kv_group_size + 2]
+            query, key, value = split_by_num_heads.split(
+                [kv_group_size, 1, 1], dim=1
+            )
 
             query = self.interleave_helper(head_size, query)
             key = self.interleave_helper(head_size, key)
@@ -165,19 +169,19 @@ class Converter_Falcon_40B_Attention_HF_CS20(
             new_state_dict[k_key] = key
             new_state_dict[v_key] = value
         elif new_key.endswith(".weight"):
-            packed_dim, dim = old_state_dict[old_key].shape
+            packed_dim, dim = packed_qkv.shape
             assert (
                 head_size * (num_kv_groups * 2 + num_heads)
             ) == packed_dim, "Invalid tensor shape {} at {}.".format(
-                old_state_dict[old_key].shape, old_key
+                packed_qkv.shape, old_key
             )
-            split_by_num_heads = old_state_dict[old_key].reshape(
+            split_by_num_heads = packed_qkv.reshape(
                 num_kv_groups, (kv_group_size + 2), -1, dim
             )
 
-            query = split_by_num_heads[:, :kv_group_size]
-            key = split_by_num_heads[:, kv_group_size : kv_group_size + 1]
-            value = split_by_num_heads[:, kv_group_size + 1 : kv_group_size + 2]
+            query, key, value = split_by_num_heads.split(
+                [kv_group_size, 1, 1], dim=1
+            )
 
             query = self.interleave_helper(head_size, query)
             key = self.interleave_helper(head_size, key)
@@ -198,13 +202,13 @@ class Converter_Falcon_40B_Attention_HF_CS20(
         # special ".bias" and ".masked_bias" register buffers that need to be
         # initialized
         q_key = old_key
-        k_key = re.sub("\.proj_q_dense_layer\.", ".proj_k_dense_layer.", q_key)
-        v_key = re.sub("\.proj_q_dense_layer\.", ".proj_v_dense_layer.", q_key)
+        k_key = q_key.replace(".proj_q_dense_layer.", ".proj_k_dense_layer.")
+        v_key = q_key.replace(".proj_q_dense_layer.", ".proj_v_dense_layer.")
 
         hf_config = action_fn_args["configs"][0]
-        cs_config = action_fn_args["configs"][1]
-        hidden_size = cs_config["model"]["hidden_size"]
-        num_heads = cs_config["model"]["num_heads"]
+        cs_model_config = action_fn_args["configs"][1]["model"]
+        hidden_size = cs_model_config["hidden_size"]
+        num_heads = cs_model_config["num_heads"]
         head_size = hidden_size // num_heads
         num_kv_groups = hf_config["n_head_kv"]
         kv_group_size = num_heads // num_kv_groups
@@ -221,8 +225,6 @@ class Converter_Falcon_40B_Attention_HF_CS20(
         key = old_state_dict[k_key]
 
         if new_key.endswith(".bias"):
-            cs_config = action_fn_args["configs"][1]
-
             # map qkv
             query = self.reverse_interleave_helper(
                 head_size,
@@ -430,7 +432,7 @@ class Converter_Falcon_40B_Headless_WithoutModelPrefix_HF_CS20(
                     'transformer.word_embeddings.weight'
                 ]
             else:
-                lm_head_weight = torch.zeros((vocab_size, embed_dim))
+                lm_head_weight = torch.empty((vocab_size, embed_dim))
                 lm_head_weight.normal_(mean=0.0, std=0.02)
             new_state_dict["lm_head.weight"] = lm_head_weight
             if use_bias_in_output:
@@ -763,9 +765,8 @@ class ConfigConverter_Falcon_40B_HF_CS20(BaseConfigConverter_HF_CS):
         config = super().pre_config_convert(config, from_index)
 
         # Apply defaults
-        for key in self.defaults[from_index]:
-            if key not in config:
-                config[key] = self.defaults[from_index][key]
+        for key, value in self.defaults[from_index].items():
+            config.setdefault(key, value)
 
         return config
 
@@ -779,9 +780,8 @@ class ConfigConverter_Falcon_40B_HF_CS20(BaseConfigConverter_HF_CS):
     ):
 
         # Apply defaults
-        for key in self.defaults[1 - from_index]:
-            if key not in new_config:
-                new_config[key] = self.defaults[1 - from_index][key]
+        for key, value in self.defaults[1 - from_index].items():
+            new_config.setdefault(key, value)
 
         if from_index == 0:
             # falcon uses rotary_dim == head_dim
@@ -359,7 +359,7 @@ class Converter_Falcon_7B_Headless_WithoutModelPrefix_HF_CS19(
                     'transformer.word_embeddings.weight'
                 ]
             else:
-                lm_head_weight = torch.zeros((vocab_size, embed_dim))
+                lm_head_weight = torch.empty((vocab_size, embed_dim))
                 lm_head_weight.normal_(mean=0.0, std=0.02)
             new_state_dict["lm_head.weight"] = lm_head_weight
             if use_bias_in_output:
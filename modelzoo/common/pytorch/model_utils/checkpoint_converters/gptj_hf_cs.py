@@ -237,7 +237,7 @@ class Converter_GPTJ_Headless_HF_CS17(BaseCheckpointConverter_HF_CS):
             if hf_config["tie_word_embeddings"]:
                 lm_head_weight = old_state_dict['wte.weight']
             else:
-                lm_head_weight = torch.zeros((vocab_size, embed_dim))
+                lm_head_weight = torch.empty((vocab_size, embed_dim))
                 lm_head_weight.normal_(mean=0.0, std=0.02)
             new_state_dict["lm_head.weight"] = lm_head_weight
             if use_bias_in_output:
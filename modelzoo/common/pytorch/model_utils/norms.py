@@ -45,9 +45,9 @@ NORM2CLASS = {
 def get_norm(norm_string):
     if norm_string is not None:
         norm_string = norm_string.lower()
-    if norm_string in NORM2CLASS:
-        return NORM2CLASS[norm_string]
-    else:
+    norm_class = NORM2CLASS.get(norm_string)
+    if norm_class is None:
         raise KeyError(
             f"class {norm_string} not found in NORM2CLASS mapping {list(NORM2CLASS.keys())}"
         )
+    return norm_class
@@ -104,21 +104,12 @@ class GenericDataProcessor:
             # Use a unique seed for each worker.
             random.seed(self.shuffle_seed + worker_id)
 
-    def create_dataloader(self):
+    def _get_dataloader_kwargs(self):
         """
-        Classmethod to create the dataloader object.
+        Keyword arguments of the `torch.utils.data.DataLoader` created by
+        `create_dataloader`, apart from the dataset.
         """
-        # Seed BufferedShuffleDataset() in case of single-worker,
-        # for multiple workers, using _worker_init_fn()
-        if (
-            self.num_workers == 0
-            and self.shuffle_seed
-            and not self.map_style_dataset
-        ):
-            random.seed(self.shuffle_seed)
-
-        data_loader = torch.utils.data.DataLoader(
-            self.dataset,
+        return dict(
             sampler=self.sampler,
             batch_size=self.batch_size,
             drop_last=self.drop_last,
@@ -134,4 +125,21 @@ class GenericDataProcessor:
             if self.num_workers > 0 and not self.map_style_dataset
             else None,
         )
+
+    def create_dataloader(self):
+        """
+        Classmethod to create the dataloader object.
+        """
+        # Seed BufferedShuffleDataset() in case of single-worker,
+        # for multiple workers, using _worker_init_fn()
+        if (
+            self.num_workers == 0
+            and self.shuffle_seed
+            and not self.map_style_dataset
+        ):
+            random.seed(self.shuffle_seed)
+
+        data_loader = torch.utils.data.DataLoader(
+            self.dataset, **self._get_dataloader_kwargs()
+        )
         return data_loader
@@ -27,6 +27,9 @@ import torch
 
 from cerebras_pytorch.distributed import get_worker_state
 from modelzoo.common.pytorch.input_utils import get_streaming_batch_size
+from modelzoo.transformers.data_processing.h5_map_dataset.readers import (
+    check_filters_available,
+)
 from modelzoo.transformers.pytorch.input_utils import (
     cluster_config,
     shard_list_of_chunks_contiguous,
@@ -221,6 +224,7 @@ class HDF5IterableDataset(torch.utils.data.IterableDataset):
         self.num_examples_in_this_task = 0
         for file_path in files_in_this_task:
             with h5py.File(file_path, mode='r') as h5_file:
+                check_filters_available(h5_file["data"])
                 num_examples_in_file = h5_file.attrs["n_examples"]
                 self.files_in_this_task.append(
                     (file_path, num_examples_in_file)
@@ -13,7 +13,10 @@
 # limitations under the License.
 
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import torch
 
 import cerebras_pytorch as cstorch
@@ -22,7 +25,7 @@ from cerebras_pytorch.distributed import get_worker_state
 from modelzoo.common.pytorch.input_utils import get_streaming_batch_size
 from modelzoo.vision.pytorch.input.utils import create_worker_cache
 
-from .readers import H5Reader, Mixture
+from .readers import H5Reader, Mixture, split_contiguous_runs
 from .samplers import CBSampler
 
 
@@ -74,11 +77,11 @@ class RestartableDataLoader(torch.utils.data.DataLoader):
         Sum samples streamed across all workers to get the number of samples
         streamed globally
         """
+        samples_streamed = worker_states[0]["previous_samples_streamed"]
+        for sd in worker_states:
+            samples_streamed += sd["samples_streamed"]
         return {
-            "samples_streamed": sum(
-                sd["samples_streamed"] for sd in worker_states
-            )
-            + worker_states[0]["previous_samples_streamed"],
+            "samples_streamed": samples_streamed,
             "seed": self.dataset.seed,
         }
 
@@ -125,6 +128,12 @@ class HDF5Dataset(torch.utils.data.Dataset):
     loading bottlenecks and might consider using `use_worker_cache=True` if
     disk access is indeed a bottleneck.
 
+    Samples are returned as torch tensors rather than numpy arrays, both by
+    `__getitem__` and `__getitems__`. Map functions still receive and may
+    return numpy arrays; any numpy array in their output, including the values
+    of a returned dict, is converted with `torch.from_numpy` before the sample
+    is returned. Other values are passed through unchanged.
+
     Args:
         params (dict): a dictionary containing the following fields:
             - "data_dir" (str or list[str]): the path to the HDF5 files.
@@ -172,6 +181,20 @@ class HDF5Dataset(torch.utils.data.Dataset):
             - "sort_files" (bool): whether or not the reader should sort the input
                 files. This is included for backwards compatibility and should
                 almost always be set to `True`.
+            - "cache_bytes" (int): the maximum number of bytes of data read
+                from disk that each process keeps in an in-memory LRU cache.
+                Useful for multi-epoch runs where the same data is read
+                repeatedly. Defaults to 0, which disables caching.
+            - "num_read_threads" (int): the number of background threads each
+                process uses to read the samples of a batch from disk while
+                the map function is applied to samples that were already read.
+                Defaults to 0, which reads every sample synchronously.
+            - "chunk_cache_bytes" (int): the size in bytes of the HDF5 chunk
+                cache used when reading chunked files. Defaults to four times
+                the size of a chunk, and at least 1 MiB.
+            - "chunk_cache_slots" (int): the number of hash table slots of the
+                HDF5 chunk cache, ideally a prime number. Defaults to the HDF5
+                default.
     """
 
     def __init__(self, params):
@@ -186,6 +209,12 @@ class HDF5Dataset(torch.utils.data.Dataset):
         drop_last = params.get("drop_last", True)
         num_samples = params.get("num_samples", None)
         self.sort_files = params.get("sort_files", True)
+        self.cache_bytes = params.get("cache_bytes", 0)
+        self.num_read_threads = params.get("num_read_threads", 0)
+        self.chunk_cache_bytes = params.get("chunk_cache_bytes", None)
+        self.chunk_cache_slots = params.get("chunk_cache_slots", None)
+        self._read_executor = None
+        self._read_executor_pid = None
 
         if data_dir and mixture_params:
             raise ValueError(
@@ -219,6 +248,7 @@ class HDF5Dataset(torch.utils.data.Dataset):
         )
 
         self.map_fn = None
+        self.batched_map_fn = None
 
         if self.by_sample and self.shuffle:
             logging.warning(
@@ -238,26 +268,119 @@ class HDF5Dataset(torch.utils.data.Dataset):
         return self._seed
 
     def map(self, fn):
-        if self.map_fn is not None:
+        if self.map_fn is not None or self.batched_map_fn is not None:
             raise ValueError(
                 f"You may only apply one map function to a H5MapDataset"
             )
         self.map_fn = fn
 
+    def batched_map(self, fn):
+        """
+        Apply a vectorized map function to whole batches of samples instead of
+        one sample at a time. `fn` receives the samples of a batch stacked
+        along a new leading axis and must return either an array or a dict of
+        arrays whose leading axis indexes the samples of the batch. This is an
+        alternative to `map` for transforms that are cheaper to compute on a
+        batch at once.
+        """
+        if self.map_fn is not None or self.batched_map_fn is not None:
+            raise ValueError(
+                f"You may only apply one map function to a H5MapDataset"
+            )
+        self.batched_map_fn = fn
+
+    @staticmethod
+    def _to_tensors(sample):
+        # `torch.from_numpy` shares memory with the array. Arrays that own
+        # their data are converted without a copy, but views are copied since
+        # they may share a buffer with other samples of the batch, e.g. the
+        # batch read from disk or overlapping `x[:-1]` and `x[1:]` slices.
+        if isinstance(sample, np.ndarray):
+            if sample.base is not None or not sample.flags.c_contiguous:
+                sample = sample.copy()
+            return torch.from_numpy(sample)
+        if isinstance(sample, dict):
+            return {k: HDF5Dataset._to_tensors(v) for k, v in sample.items()}
+        return sample
+
+    @staticmethod
+    def _unbatch(batch, batch_size):
+        if isinstance(batch, dict):
+            return [
+                {k: v[i] for k, v in batch.items()} for i in range(batch_size)
+            ]
+        return [batch[i] for i in range(batch_size)]
+
     def _set_up_reader(self, data_dir, subset):
         if not isinstance(data_dir, list):
             data_dir = [data_dir]
         if self.use_worker_cache and cstorch.use_cs() and dist.is_streamer():
             data_dir = [create_worker_cache(d) for d in data_dir]
 
-        reader = H5Reader(data_dir, self.msl, True, subset, self.sort_files)
+        reader = H5Reader(
+            data_dir,
+            self.msl,
+            True,
+            subset,
+            self.sort_files,
+            cache_bytes=self.cache_bytes,
+            chunk_cache_bytes=self.chunk_cache_bytes,
+            chunk_cache_slots=self.chunk_cache_slots,
+            random_access=self.shuffle,
+        )
         return reader
 
+    def _get_read_executor(self):
+        # Threads don't survive a fork, so the executor is created lazily in
+        # the process that actually reads the data, i.e. the dataloader worker.
+        # An executor inherited from the parent process has no threads in this
+        # process and is simply dropped.
+        pid = os.getpid()
+        if self._read_executor is None or self._read_executor_pid != pid:
+            self._read_executor = ThreadPoolExecutor(
+                max_workers=self.num_read_threads,
+                thread_name_prefix="h5_reader",
+            )
+            self._read_executor_pid = pid
+        return self._read_executor
+
+    def _shutdown_read_executor(self):
+        executor = getattr(self, "_read_executor", None)
+        if executor is not None and self._read_executor_pid == os.getpid():
+            executor.shutdown(wait=False)
+        self._read_executor = None
+        self._read_executor_pid = None
+
+    def __del__(self):
+        self._shutdown_read_executor()
+
     def __getitem__(self, i):
         x = self.reader[i]
         if self.map_fn is not None:
-            return self.map_fn(x)
-        return x
+            x = self.map_fn(x)
+        elif self.batched_map_fn is not None:
+            x = self._unbatch(self.batched_map_fn(x[np.newaxis]), 1)[0]
+        return self._to_tensors(x)
+
+    def __getitems__(self, indices):
+        # runs of consecutive indices are read from disk with a single read
+        if not self.num_read_threads:
+            samples = self.reader.__getitems__(indices)
+        else:
+            # `Executor.map` submits all reads up front, so later runs of the
+            # batch are read from disk while the map function runs on earlier
+            # ones
+            runs = self._get_read_executor().map(
+                lambda run: self.reader.__getitems__([indices[p] for p in run]),
+                split_contiguous_runs(indices),
+            )
+            samples = (x for run in runs for x in run)
+        if self.map_fn is not None:
+            samples = [self.map_fn(x) for x in samples]
+        elif self.batched_map_fn is not None:
+            samples = np.stack(list(samples))
+            samples = self._unbatch(self.batched_map_fn(samples), len(samples))
+        return [self._to_tensors(x) for x in samples]
 
     def __len__(self):
         return len(self.reader)
@@ -12,13 +12,64 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 import tempfile
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import List, Optional, Sequence, Tuple, Union
 
 import h5py
 import numpy as np
 
+try:
+    # Registers the HDF5 compression filters (e.g. `lz4`) that the
+    # preprocessing scripts can write, so that such files can be read back.
+    import hdf5plugin  # noqa: F401
+except ImportError:
+    hdf5plugin = None
+
+_HAS_PREADV = hasattr(os, "preadv")
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+
+def check_filters_available(dataset: h5py.Dataset):
+    """Checks that every HDF5 filter applied to `dataset` can be decoded.
+
+    Args:
+        dataset: The dataset to check.
+    Raises:
+        ImportError: If a filter isn't available, which is the case for files
+            written with `lz4` compression when `hdf5plugin` isn't installed.
+    """
+    plist = dataset.id.get_create_plist()
+    for i in range(plist.get_nfilters()):
+        filter_id = plist.get_filter(i)[0]
+        if not h5py.h5z.filter_avail(filter_id):
+            raise ImportError(
+                f"Dataset {dataset.name} in {dataset.file.filename} is "
+                f"compressed with HDF5 filter {filter_id}, which is not "
+                f"available. Files written with `lz4` compression need the "
+                f"`hdf5plugin` package to be read, please install it with "
+                f"`pip install hdf5plugin`."
+            )
+
+
+def split_contiguous_runs(indices: Sequence[int]) -> List[np.ndarray]:
+    """Splits `indices` into runs of consecutive increasing integers.
+
+    Args:
+        indices: The indices to split.
+    Returns:
+        A list of arrays of positions into `indices`, one array per run, such
+        that `indices` is consecutive and increasing within each run.
+    """
+    indices = np.asarray(indices)
+    if len(indices) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    return np.split(np.arange(len(indices)), breaks)
+
 
 class H5Reader:
     """Class for reading individual sequences from HDF5 files stored on disk.
@@ -36,6 +87,10 @@ class H5Reader:
         read_extra_token: bool = False,
         data_subset: Optional[str] = None,
         sort: bool = True,
+        cache_bytes: int = 0,
+        chunk_cache_bytes: Optional[int] = None,
+        chunk_cache_slots: Optional[int] = None,
+        random_access: bool = False,
     ):
         """Creates a reader for an HDF5 corpus.
 
@@ -62,6 +117,21 @@ class H5Reader:
             sort: Whether to sort the file paths after reading them. This flag
                 is included for backwards compatibility and should almost always
                 be set to `True`. It will be removed in the future.
+            cache_bytes: The maximum number of bytes of data read from disk to
+                keep in an in-memory LRU cache. This is useful for multi-epoch
+                runs where the same data is read repeatedly. The cache is
+                local to each process. Set to 0 (the default) to disable
+                caching.
+            chunk_cache_bytes: The size in bytes of the HDF5 chunk cache used
+                when reading chunked files. Defaults to four times the size of
+                a chunk, but at least the HDF5 default of 1 MiB.
+            chunk_cache_slots: The number of hash table slots of the HDF5
+                chunk cache. Should be a prime number for best performance.
+                Defaults to the HDF5 default.
+            random_access: Whether samples are expected to be read in random
+                order, e.g. because they are shuffled at runtime. This is used
+                to advise the OS on how to read ahead in files that are read
+                directly from disk.
         """
         files = []
         if not isinstance(data_dirs, list):
@@ -107,13 +177,24 @@ class H5Reader:
             by_sample = True
 
         if by_sample:
-            self._impl = _SequencedH5Reader(files, data_subset=data_subset)
+            self._impl = _SequencedH5Reader(
+                files,
+                data_subset=data_subset,
+                cache_bytes=cache_bytes,
+                chunk_cache_bytes=chunk_cache_bytes,
+                chunk_cache_slots=chunk_cache_slots,
+                random_access=random_access,
+            )
         else:
             self._impl = _CorpusH5Reader(
                 files,
                 sequence_length=sequence_length,
                 read_extra_token=read_extra_token,
                 data_subset=data_subset,
+                cache_bytes=cache_bytes,
+                chunk_cache_bytes=chunk_cache_bytes,
+                chunk_cache_slots=chunk_cache_slots,
+                random_access=random_access,
             )
 
     @property
@@ -135,6 +216,22 @@ class H5Reader:
         """
         return self._impl[i]
 
+    def __getitems__(self, indices: Sequence[int]) -> List[np.ndarray]:
+        """Reads multiple sequences of the dataset from disk.
+
+        Runs of consecutive indices are read from disk with a single read.
+        The returned arrays may therefore be views into a shared buffer, and
+        when reading from a corpus with `read_extra_token` set, the extra token
+        of one sequence is shared with the first token of the next sequence.
+
+        Args:
+            indices: The indices of the items to return.
+        Returns:
+            A list of the samples at each of the given indices, as returned by
+            `__getitem__`.
+        """
+        return self._impl.__getitems__(indices)
+
     def __len__(self) -> int:
         """Returns total number of sequences in the dataset."""
         return len(self._impl)
@@ -143,18 +240,34 @@ class H5Reader:
 class _SequencedH5Reader:
     """Class for reading preprocessed samples from HDF5 files stored on disk."""
 
-    def __init__(self, files: List[str], data_subset: Optional[str] = None):
+    def __init__(
+        self,
+        files: List[str],
+        data_subset: Optional[str] = None,
+        cache_bytes: int = 0,
+        chunk_cache_bytes: Optional[int] = None,
+        chunk_cache_slots: Optional[int] = None,
+        random_access: bool = False,
+    ):
         """Creates an HDF5 reader for preprocessed sequences.
 
         Args:
             files: HDF5 files to read from.
             data_subset: A string specifying the subset of the corpus to
                 consider.
+            cache_bytes: The maximum size in bytes of the in-memory cache of
+                data read from disk.
+            chunk_cache_bytes: The size in bytes of the HDF5 chunk cache.
+            chunk_cache_slots: The number of slots of the HDF5 chunk cache.
+            random_access: Whether samples are expected to be read in random
+                order.
         """
         vsources: List[h5py.VirtualSource] = []
+        byte_offsets: List[Optional[int]] = []
         for idx, filepath in enumerate(files):
             with h5py.File(filepath, "r") as f:
                 dataset = f["data"]
+                check_filters_available(dataset)
 
                 if idx == 0:
                     data_shape = dataset.shape
@@ -175,9 +288,37 @@ class _SequencedH5Reader:
                             f"in {filepath}."
                         )
 
+                if idx == 0:
+                    data_chunks = dataset.chunks
+
                 vsources.append(h5py.VirtualSource(dataset))
+                byte_offsets.append(_ContiguousDataset.get_byte_offset(dataset))
 
-        self._vdataset = _VirtualDataset(vsources)
+        if all(offset is not None for offset in byte_offsets):
+            # Contiguous, unfiltered files can be read directly from disk,
+            # which avoids the per-read overhead of h5py.
+            self._vdataset = _ContiguousDataset(
+                files,
+                byte_offsets,
+                [s.shape[0] for s in vsources],
+                data_dtype,
+                row_shape=data_shape[1:],
+                random_access=random_access,
+            )
+        else:
+            self._vdataset = _VirtualDataset(
+                vsources,
+                chunk_cache_bytes=_get_chunk_cache_bytes(
+                    vsources[0], data_chunks, chunk_cache_bytes
+                ),
+                chunk_cache_slots=chunk_cache_slots,
+            )
+        if cache_bytes > 0:
+            self._vdataset = _CachedDataset(
+                self._vdataset,
+                _CachedDataset.get_block_size(vsources[0], data_chunks),
+                cache_bytes,
+            )
         self._num_sequences = len(self._vdataset)
 
         if data_subset is not None:
@@ -195,6 +336,19 @@ class _SequencedH5Reader:
 
         return self._vdataset[i].astype(np.int32)
 
+    def __getitems__(self, indices: Sequence[int]) -> List[np.ndarray]:
+        """Reads multiple items of the dataset from disk."""
+        if self._segmenter:
+            indices = [self._segmenter.map_index(i) for i in indices]
+
+        samples = [None] * len(indices)
+        for run in split_contiguous_runs(indices):
+            start = indices[run[0]]
+            rows = self._vdataset[start : start + len(run)].astype(np.int32)
+            for row, pos in zip(rows, run):
+                samples[pos] = row
+        return samples
+
     def __len__(self) -> int:
         """Returns total number of sequences in the dataset."""
         return self._num_sequences
@@ -209,6 +363,10 @@ class _CorpusH5Reader:
         sequence_length: Optional[int] = None,
         read_extra_token: bool = False,
         data_subset: Optional[str] = None,
+        cache_bytes: int = 0,
+        chunk_cache_bytes: Optional[int] = None,
+        chunk_cache_slots: Optional[int] = None,
+        random_access: bool = False,
     ):
         """Creates an HDF5 reader for an HDF5 corpus.
 
@@ -219,11 +377,19 @@ class _CorpusH5Reader:
                 after the end of the sequence.
             data_subset: A string specifying the subset of the corpus to
                 consider.
+            cache_bytes: The maximum size in bytes of the in-memory cache of
+                data read from disk.
+            chunk_cache_bytes: The size in bytes of the HDF5 chunk cache.
+            chunk_cache_slots: The number of slots of the HDF5 chunk cache.
+            random_access: Whether samples are expected to be read in random
+                order.
         """
         vsources: List[h5py.VirtualSource] = []
+        byte_offsets: List[Optional[int]] = []
         for idx, filepath in enumerate(files):
             with h5py.File(filepath, "r") as f:
                 dataset = f["data"]
+                check_filters_available(dataset)
 
                 if len(dataset.shape) != 1:
                     raise ValueError(
@@ -234,6 +400,7 @@ class _CorpusH5Reader:
 
                 if idx == 0:
                     data_dtype = dataset.dtype
+                    data_chunks = dataset.chunks
                 else:
                     if dataset.dtype != data_dtype:
                         raise ValueError(
@@ -243,8 +410,33 @@ class _CorpusH5Reader:
                         )
 
                 vsources.append(h5py.VirtualSource(dataset))
+                byte_offsets.append(_ContiguousDataset.get_byte_offset(dataset))
 
-        self._vdataset = _VirtualDataset(vsources)
+        if all(offset is not None for offset in byte_offsets):
+            # Contiguous, unfiltered files can be read directly from disk,
+            # which avoids the per-read overhead of h5py.
+            self._vdataset = _ContiguousDataset(
+                files,
+                byte_offsets,
+                [s.shape[0] for s in vsources],
+                data_dtype,
+                random_access=random_access,
+            )
+        else:
+            self._vdataset = _VirtualDataset(
+                vsources,
+                chunk_cache_bytes=_get_chunk_cache_bytes(
+                    vsources[0], data_chunks, chunk_cache_bytes
+                ),
+                chunk_cache_slots=chunk_cache_slots,
+            )
+
+        if cache_bytes > 0:
+            self._vdataset = _CachedDataset(
+                self._vdataset,
+                _CachedDataset.get_block_size(vsources[0], data_chunks),
+                cache_bytes,
+            )
 
         self._msl = sequence_length
         self._num_extra_tokens = 1 if read_extra_token else 0
@@ -270,22 +462,66 @@ class _CorpusH5Reader:
             tok_idx : tok_idx + self._msl + self._num_extra_tokens
         ].astype(np.int32)
 
+    def __getitems__(self, indices: Sequence[int]) -> List[np.ndarray]:
+        """Reads multiple items of the dataset from disk."""
+        if self._segmenter:
+            indices = [self._segmenter.map_index(i) for i in indices]
+
+        samples = [None] * len(indices)
+        for run in split_contiguous_runs(indices):
+            tok_idx = self._msl * indices[run[0]]
+            num_tokens = self._msl * len(run) + self._num_extra_tokens
+            tokens = self._vdataset[tok_idx : tok_idx + num_tokens]
+            tokens = tokens.astype(np.int32)
+            for k, pos in enumerate(run):
+                tok_idx = self._msl * k
+                samples[pos] = tokens[
+                    tok_idx : tok_idx + self._msl + self._num_extra_tokens
+                ]
+        return samples
+
     def __len__(self) -> int:
         """Returns total number of sequences in the dataset."""
         return self._num_sequences
 
 
+def _get_chunk_cache_bytes(
+    source: h5py.VirtualSource, chunks, chunk_cache_bytes: Optional[int]
+) -> Optional[int]:
+    """Returns the size of the HDF5 chunk cache to use when reading `source`.
+
+    If not specified explicitly, the cache is made large enough to hold a few
+    chunks so that sequences that straddle a chunk boundary don't cause the
+    previous chunk to be evicted and re-read.
+    """
+    if chunk_cache_bytes is not None or chunks is None:
+        return chunk_cache_bytes
+    chunk_bytes = np.dtype(source.dtype).itemsize * int(np.prod(chunks))
+    return max(1 << 20, 4 * chunk_bytes)
+
+
 class _VirtualDataset:
     """Class that represents a virtual dataset over multiple HDF5 files."""
 
-    def __init__(self, sources: List[h5py.VirtualSource]):
+    def __init__(
+        self,
+        sources: List[h5py.VirtualSource],
+        chunk_cache_bytes: Optional[int] = None,
+        chunk_cache_slots: Optional[int] = None,
+    ):
         """Constructs a virtual dataset from a list of virtual sources.
 
         Args:
             sources: A list of virtual sources to construct the dataset from.
                 It is expected that all virtual sources have the same shape
                 (except for the first axis) and dtype.
+            chunk_cache_bytes: The size in bytes of the HDF5 chunk cache. Uses
+                the HDF5 default if `None`.
+            chunk_cache_slots: The number of slots of the HDF5 chunk cache.
+                Uses the HDF5 default if `None`.
         """
+        self._chunk_cache_bytes = chunk_cache_bytes
+        self._chunk_cache_slots = chunk_cache_slots
 
         length = sum(s.shape[0] for s in sources)
 
@@ -307,6 +543,7 @@ class _VirtualDataset:
 
         self.__dataset_file = None
         self.__dataset = None
+        self._open_lock = threading.Lock()
 
     @property
     def _dataset(self) -> h5py.Dataset:
@@ -320,8 +557,16 @@ class _VirtualDataset:
         to be modified while this object is alive.
         """
         if self.__dataset is None:
-            self.__dataset_file = h5py.File(self._dataset_tmpfile.name, "r")
-            self.__dataset = self.__dataset_file["data"]
+            # reader threads may get here at the same time
+            with self._open_lock:
+                if self.__dataset is None:
+                    self.__dataset_file = h5py.File(
+                        self._dataset_tmpfile.name,
+                        "r",
+                        rdcc_nbytes=self._chunk_cache_bytes,
+                        rdcc_nslots=self._chunk_cache_slots,
+                    )
+                    self.__dataset = self.__dataset_file["data"]
         return self.__dataset
 
     def __getitem__(self, i) -> np.ndarray:
@@ -333,6 +578,275 @@ class _VirtualDataset:
         return self._dataset.shape[0]
 
 
+class _ContiguousDataset:
+    """Class that represents a dataset over multiple HDF5 files by reading the
+    raw data on disk directly.
+
+    This is only valid for datasets that are stored contiguously (i.e. not
+    chunked) and without any filters such as compression, in which case the
+    data of each file is a single flat buffer at a fixed byte offset.
+
+    Slices are read with `os.preadv` directly into a preallocated array where
+    available. Unlike reads through h5py or page faults on a memory map, this
+    releases the GIL, so that reads issued from multiple threads of a worker
+    can proceed in parallel. Other platforms read through memory maps.
+    """
+
+    def __init__(
+        self,
+        files: List[str],
+        byte_offsets: List[int],
+        lengths: List[int],
+        dtype: np.dtype,
+        row_shape: Tuple[int, ...] = (),
+        random_access: bool = False,
+    ):
+        """Constructs a dataset over contiguous raw data.
+
+        Args:
+            files: HDF5 files to read from.
+            byte_offsets: The byte offset of the raw data within each file.
+            lengths: The size of the first axis of the dataset in each file.
+            dtype: The dtype of the data on disk.
+            row_shape: The shape of the dataset beyond the first axis, which
+                must be the same for all files.
+            random_access: Whether the data is expected to be read in random
+                order. The OS is advised to disable read ahead if so, and to
+                read ahead aggressively otherwise.
+        """
+        self._files = [str(f) for f in files]
+        self._byte_offsets = byte_offsets
+        self._lengths = lengths
+        self._dtype = np.dtype(dtype)
+        self._row_shape = tuple(row_shape)
+        self._row_bytes = self._dtype.itemsize * int(np.prod(self._row_shape))
+        self._random_access = random_access
+        self._boundaries = np.cumsum(lengths)
+        self.__memmaps = None
+        self.__fds = None
+        self._open_lock = threading.Lock()
+
+    @staticmethod
+    def get_byte_offset(dataset: h5py.Dataset) -> Optional[int]:
+        """Returns the byte offset of the raw data of `dataset` in its file,
+        or `None` if the dataset can't be read directly.
+        """
+        # filters such as compression require a chunked layout, so checking
+        # for a contiguous layout is sufficient
+        if dataset.chunks is not None or dataset.shape[0] == 0:
+            return None
+        # `get_offset` returns `None` if storage hasn't been allocated or
+        # the data doesn't live in this file (e.g. virtual or external data)
+        return dataset.id.get_offset()
+
+    @property
+    def _memmaps(self) -> List[np.memmap]:
+        """Returns the memory maps of each file.
+
+        Like `_VirtualDataset._dataset`, the memory maps are created lazily on
+        first access so that they are created after forking.
+        """
+        if self.__memmaps is None:
+            with self._open_lock:
+                if self.__memmaps is None:
+                    self.__memmaps = [
+                        np.memmap(
+                            filepath,
+                            dtype=self._dtype,
+                            mode="r",
+                            offset=offset,
+                            shape=(length, *self._row_shape),
+                        )
+                        for filepath, offset, length in zip(
+                            self._files, self._byte_offsets, self._lengths
+                        )
+                    ]
+        return self.__memmaps
+
+    @property
+    def _fds(self) -> List[int]:
+        """Returns read-only file descriptors of each file, opened lazily.
+
+        Reader threads may get here at the same time, so the descriptors are
+        opened under a lock and only published once they are all advised, so
+        that no descriptor is leaked by a concurrent first access.
+        """
+        if self.__fds is None:
+            with self._open_lock:
+                if self.__fds is None:
+                    fds = [os.open(f, os.O_RDONLY) for f in self._files]
+                    if _HAS_FADVISE:
+                        advice = (
+                            os.POSIX_FADV_RANDOM
+                            if self._random_access
+                            else os.POSIX_FADV_SEQUENTIAL
+                        )
+                        for fd, offset, length in zip(
+                            fds, self._byte_offsets, self._lengths
+                        ):
+                            os.posix_fadvise(
+                                fd, offset, length * self._row_bytes, advice
+                            )
+                    self.__fds = fds
+        return self.__fds
+
+    def _read_into(self, out: np.ndarray, file_idx: int, start: int):
+        """Reads `len(out)` rows of file `file_idx` starting at row `start` of
+        that file into `out`.
+        """
+        if not _HAS_PREADV:
+            out[:] = self._memmaps[file_idx][start : start + len(out)]
+            return
+
+        buffer = memoryview(out).cast("B")
+        offset = self._byte_offsets[file_idx] + start * self._row_bytes
+        while len(buffer):
+            num_bytes = os.preadv(self._fds[file_idx], [buffer], offset)
+            if num_bytes == 0:
+                raise EOFError(
+                    f"Unexpected end of file while reading "
+                    f"{self._files[file_idx]}."
+                )
+            buffer = buffer[num_bytes:]
+            offset += num_bytes
+
+    def __getitem__(self, i) -> np.ndarray:
+        """Returns the `i`th element or contiguous slice of the dataset."""
+        if not isinstance(i, slice):
+            i = int(i)
+            if i < 0:
+                i += len(self)
+            file_idx = self._boundaries.searchsorted(i, side="right")
+            start = self._boundaries[file_idx - 1] if file_idx else 0
+            return self._memmaps[file_idx][i - start]
+
+        start, stop, step = i.indices(len(self))
+        if step != 1:
+            raise ValueError(
+                f"Only contiguous slices are supported, got step {step}."
+            )
+
+        out = np.empty(
+            (max(0, stop - start), *self._row_shape), dtype=self._dtype
+        )
+        out_idx = 0
+        file_idx = self._boundaries.searchsorted(start, side="right")
+        while start < stop:
+            file_start = self._boundaries[file_idx - 1] if file_idx else 0
+            file_stop = min(stop, self._boundaries[file_idx])
+            num_read = file_stop - start
+            self._read_into(
+                out[out_idx : out_idx + num_read], file_idx, start - file_start
+            )
+            out_idx += num_read
+            start = file_stop
+            file_idx += 1
+        return out
+
+    def __del__(self):
+        if self.__fds is not None:
+            for fd in self.__fds:
+                os.close(fd)
+
+    def __len__(self):
+        """Returns the length of the dataset."""
+        return int(self._boundaries[-1])
+
+
+class _CachedDataset:
+    """Class that wraps a dataset with an in-memory LRU cache.
+
+    The dataset is split into fixed size blocks along its first axis, and each
+    read is served from the cached blocks that it overlaps. Blocks are read
+    from the underlying dataset on a cache miss and the least recently used
+    blocks are evicted once the cache holds more than `max_bytes` of data.
+    The cache may be shared by multiple reader threads.
+    """
+
+    def __init__(self, dataset, block_size: int, max_bytes: int):
+        """Constructs a cached view of a dataset.
+
+        Args:
+            dataset: The dataset to cache. Must support `len` and contiguous
+                slicing along the first axis.
+            block_size: The number of elements along the first axis of the
+                dataset that are read and cached together.
+            max_bytes: The maximum number of bytes to hold in the cache.
+        """
+        self._dataset = dataset
+        self._block_size = block_size
+        self._max_bytes = max_bytes
+        self._len = len(dataset)
+        self._blocks = OrderedDict()
+        self._num_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_block_size(source: h5py.VirtualSource, chunks) -> int:
+        """Returns the size of the blocks to cache for the given source.
+
+        Chunked datasets are cached one chunk at a time, since HDF5 reads
+        whole chunks anyway. Contiguous datasets are cached in blocks of
+        roughly 1 MiB.
+        """
+        if chunks is not None:
+            return chunks[0]
+        row_bytes = np.dtype(source.dtype).itemsize * int(
+            np.prod(source.shape[1:])
+        )
+        return max(1, (1 << 20) // max(1, row_bytes))
+
+    def _get_block(self, block_idx: int) -> np.ndarray:
+        with self._lock:
+            block = self._blocks.get(block_idx)
+            if block is not None:
+                self._blocks.move_to_end(block_idx)
+                return block
+
+        # read outside of the lock so that cache misses don't serialize
+        start = block_idx * self._block_size
+        block = self._dataset[start : min(start + self._block_size, self._len)]
+        with self._lock:
+            if block_idx not in self._blocks:
+                self._blocks[block_idx] = block
+                self._num_bytes += block.nbytes
+            while self._num_bytes > self._max_bytes and len(self._blocks) > 1:
+                _, evicted = self._blocks.popitem(last=False)
+                self._num_bytes -= evicted.nbytes
+        return block
+
+    def __getitem__(self, i) -> np.ndarray:
+        """Returns the `i`th element or contiguous slice of the dataset."""
+        if not isinstance(i, slice):
+            i = int(i)
+            if i < 0:
+                i += self._len
+            block_idx, offset = divmod(i, self._block_size)
+            return self._get_block(block_idx)[offset]
+
+        start, stop, step = i.indices(self._len)
+        if step != 1:
+            raise ValueError(
+                f"Only contiguous slices are supported, got step {step}."
+            )
+        if start >= stop:
+            return self._dataset[start:start]
+
+        first_block = start // self._block_size
+        last_block = (stop - 1) // self._block_size
+        offset = first_block * self._block_size
+        if first_block == last_block:
+            return self._get_block(first_block)[start - offset : stop - offset]
+        blocks = [
+            self._get_block(idx) for idx in range(first_block, last_block + 1)
+        ]
+        return np.concatenate(blocks)[start - offset : stop - offset]
+
+    def __len__(self):
+        """Returns the length of the dataset."""
+        return self._len
+
+
 class _DatasetSegmenter:
     def __init__(self, num_sequences: int, data_subset: str):
         offsets_full_dataset = []
@@ -508,5 +1022,30 @@ class Mixture:
             sample_index = (i - offset) % len(dataset)
             return dataset[sample_index]
 
+    def __getitems__(self, indices):
+        indices = np.asarray(indices)
+        if self.interleave:
+            dataset_indices = self.dataset_indices[indices]
+            sample_indices = self.dataset_samples[indices]
+        else:
+            dataset_indices = np.searchsorted(
+                self.boundaries, indices, side="right"
+            )
+            offsets = np.insert(self.boundaries, 0, 0)[dataset_indices]
+            lengths = np.array([len(d) for d in self.datasets])
+            sample_indices = (indices - offsets) % lengths[dataset_indices]
+
+        samples = [None] * len(indices)
+        for dataset_index in np.unique(dataset_indices):
+            dataset = self.datasets[dataset_index]
+            positions = np.flatnonzero(dataset_indices == dataset_index)
+            if hasattr(dataset, "__getitems__"):
+                items = dataset.__getitems__(sample_indices[positions])
+            else:
+                items = [dataset[i] for i in sample_indices[positions]]
+            for pos, item in zip(positions, items):
+                samples[pos] = item
+        return samples
+
     def __len__(self):
         return self.total_samples
@@ -0,0 +1,227 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the batched read path of `HDF5Dataset`."""
+
+import gc
+
+import h5py
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("cerebras_pytorch")
+
+from modelzoo.transformers.data_processing.h5_map_dataset import (
+    HDF5Dataset,
+)
+
+FILE_LENGTHS = [13, 7, 1, 20]
+SEQUENCE_LENGTH = 8
+
+
+def _write_files(directory, by_sample, seed=0):
+    directory.mkdir(exist_ok=True)
+    rng = np.random.default_rng(seed)
+    for i, n in enumerate(FILE_LENGTHS):
+        shape = (n, 3, SEQUENCE_LENGTH) if by_sample else (n * SEQUENCE_LENGTH,)
+        with h5py.File(directory / f"data-{i:05d}.h5", "w") as f:
+            f.attrs["n_examples"] = n
+            f.create_dataset(
+                "data", data=rng.integers(0, 50000, size=shape).astype("u2")
+            )
+    return str(directory)
+
+
+def _make_dataset(tmp_path, by_sample, mixture=False, **params):
+    params = {"batch_size": 4, **params}
+    if mixture:
+        params["mixture"] = [
+            {"data_dir": _write_files(tmp_path / "a", by_sample), "weight": 1},
+            {
+                "data_dir": _write_files(tmp_path / "b", by_sample, seed=1),
+                "weight": 2,
+            },
+        ]
+    else:
+        params["data_dir"] = _write_files(tmp_path / "a", by_sample)
+    if not by_sample:
+        params["max_sequence_length"] = SEQUENCE_LENGTH
+    return HDF5Dataset(params)
+
+
+def _batch_indices(length, seed=0):
+    """Unsorted indices with duplicates and runs across file boundaries."""
+    rng = np.random.default_rng(seed)
+    indices = [*range(11, 23), 0, 0, length - 1, 3, 2, 1, 1]
+    indices.extend(rng.integers(0, length, size=length).tolist())
+    return [i for i in indices if i < length]
+
+
+def _assert_equal(actual, expected):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys()
+        for k in expected:
+            _assert_equal(actual[k], expected[k])
+    else:
+        assert isinstance(actual, torch.Tensor)
+        assert actual.dtype == expected.dtype
+        torch.testing.assert_close(actual, expected, rtol=0, atol=0)
+
+
+def _lm_map_fn(x):
+    return {
+        "input_ids": x[:-1],
+        "labels": x[1:],
+        "attention_mask": np.ones_like(x[:-1]),
+    }
+
+
+def _sample_map_fn(x):
+    return {"input_ids": x[0], "attention_mask": x[1], "labels": x[2]}
+
+
+@pytest.mark.parametrize("num_read_threads", [0, 2])
+@pytest.mark.parametrize("use_map_fn", [False, True])
+@pytest.mark.parametrize("mixture", [False, True])
+@pytest.mark.parametrize("by_sample", [False, True])
+def test_getitems_matches_getitem(
+    tmp_path, by_sample, mixture, use_map_fn, num_read_threads
+):
+    dataset = _make_dataset(
+        tmp_path, by_sample, mixture, num_read_threads=num_read_threads
+    )
+    if use_map_fn:
+        dataset.map(_sample_map_fn if by_sample else _lm_map_fn)
+
+    indices = _batch_indices(len(dataset))
+    samples = dataset.__getitems__(indices)
+    assert len(samples) == len(indices)
+    for sample, i in zip(samples, indices):
+        _assert_equal(sample, dataset[i])
+
+
+def test_read_executor_shutdown(tmp_path):
+    dataset = _make_dataset(tmp_path, by_sample=True, num_read_threads=2)
+    dataset.__getitems__(list(range(8)))
+    executor = dataset._read_executor
+    assert executor is dataset._get_read_executor()
+
+    dataset._shutdown_read_executor()
+    assert executor._shutdown
+    assert dataset._read_executor is None
+    # a new executor is created on the next batched read
+    dataset.__getitems__(list(range(8)))
+    executor = dataset._read_executor
+    # the dataset and its sampler reference each other
+    del dataset
+    gc.collect()
+    assert executor._shutdown
+
+
+def test_read_executor_not_inherited(tmp_path):
+    dataset = _make_dataset(tmp_path, by_sample=True, num_read_threads=2)
+    dataset.__getitems__(list(range(8)))
+    parent_executor = dataset._read_executor
+    # pretend to be a forked dataloader worker
+    dataset._read_executor_pid = -1
+    dataset.__getitems__(list(range(8)))
+    assert dataset._read_executor is not parent_executor
+    # the inherited executor belongs to the parent and is left alone
+    assert not parent_executor._shutdown
+    parent_executor.shutdown()
+
+
+def _batched_lm_map_fn(x):
+    return {
+        "input_ids": x[:, :-1],
+        "labels": x[:, 1:],
+        "attention_mask": np.ones_like(x[:, :-1]),
+    }
+
+
+def test_unbatch():
+    batch = np.arange(24).reshape(4, 6)
+    samples = HDF5Dataset._unbatch(batch, 4)
+    assert len(samples) == 4
+    for i, sample in enumerate(samples):
+        np.testing.assert_array_equal(sample, batch[i])
+
+    batch = {"a": batch, "b": batch * 2}
+    samples = HDF5Dataset._unbatch(batch, 4)
+    for i, sample in enumerate(samples):
+        assert sample.keys() == {"a", "b"}
+        np.testing.assert_array_equal(sample["a"], batch["a"][i])
+        np.testing.assert_array_equal(sample["b"], batch["b"][i])
+
+
+def test_to_tensors_doesnt_alias():
+    buffer = np.arange(20, dtype=np.int32).reshape(2, 10)
+    sample = {"input_ids": buffer[0, :-1], "labels": buffer[0, 1:]}
+    owned = np.arange(5, dtype=np.int32)
+
+    tensors = HDF5Dataset._to_tensors(sample)
+    torch.testing.assert_close(tensors["input_ids"], torch.arange(9).int())
+    torch.testing.assert_close(tensors["labels"], torch.arange(1, 10).int())
+
+    # writes to one tensor don't leak into other samples or the buffer
+    tensors["input_ids"][1] = -1
+    assert tensors["labels"][0] == 1
+    assert buffer[0, 1] == 1
+
+    # non-contiguous views are made contiguous
+    assert HDF5Dataset._to_tensors(buffer[:, ::2]).is_contiguous()
+
+    # arrays that own their data are converted without a copy
+    tensor = HDF5Dataset._to_tensors(owned)
+    tensor[0] = -1
+    assert owned[0] == -1
+
+    assert HDF5Dataset._to_tensors(3) == 3
+
+
+@pytest.mark.parametrize("num_read_threads", [0, 2])
+@pytest.mark.parametrize("mixture", [False, True])
+def test_batched_map_matches_map(tmp_path, mixture, num_read_threads):
+    dataset = _make_dataset(
+        tmp_path, False, mixture, num_read_threads=num_read_threads
+    )
+    dataset.map(_lm_map_fn)
+    batched_dataset = _make_dataset(
+        tmp_path, False, mixture, num_read_threads=num_read_threads
+    )
+    batched_dataset.batched_map(_batched_lm_map_fn)
+
+    indices = _batch_indices(len(dataset))
+    samples = batched_dataset.__getitems__(indices)
+    for sample, expected, i in zip(
+        samples, dataset.__getitems__(indices), indices
+    ):
+        _assert_equal(sample, expected)
+        _assert_equal(batched_dataset[i], expected)
+
+    # samples of a batch don't share memory with each other
+    samples[0]["input_ids"].fill_(-1)
+    samples[0]["labels"].fill_(-1)
+    for sample, i in zip(samples[1:], indices[1:]):
+        _assert_equal(sample, dataset[i])
+
+
+def test_map_functions_are_exclusive(tmp_path):
+    dataset = _make_dataset(tmp_path, by_sample=False)
+    dataset.batched_map(_batched_lm_map_fn)
+    with pytest.raises(ValueError):
+        dataset.map(_lm_map_fn)
+    with pytest.raises(ValueError):
+        dataset.batched_map(_batched_lm_map_fn)
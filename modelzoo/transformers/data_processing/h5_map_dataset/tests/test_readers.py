@@ -0,0 +1,370 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests that every read path of the HDF5 readers matches h5py."""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import h5py
+import numpy as np
+import pytest
+
+from modelzoo.transformers.data_processing.h5_map_dataset import readers
+
+# Sizes are chosen so that files, chunks and cache blocks don't line up.
+FILE_LENGTHS = [13, 7, 1, 20]
+ROW_SHAPE = (3, 5)
+
+
+def _write_files(directory, arrays, chunks=None):
+    """Writes each array to its own file and returns the file paths."""
+    directory.mkdir(exist_ok=True)
+    files = []
+    for i, array in enumerate(arrays):
+        path = directory / f"data-{i:05d}.h5"
+        with h5py.File(path, "w") as f:
+            f.attrs["n_examples"] = len(array)
+            f.create_dataset(
+                "data",
+                data=array,
+                chunks=(
+                    None
+                    if chunks is None
+                    else (min(chunks, len(array)), *array.shape[1:])
+                ),
+            )
+        files.append(path)
+    return files
+
+
+def _make_arrays(row_shape, dtype="u2", seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        rng.integers(0, 60000, size=(n, *row_shape)).astype(dtype)
+        for n in FILE_LENGTHS
+    ]
+
+
+def _read_h5py(files):
+    data = []
+    for path in files:
+        with h5py.File(path, "r") as f:
+            data.append(f["data"][()])
+    return np.concatenate(data)
+
+
+def _make_contiguous(files):
+    lengths, offsets = [], []
+    for path in files:
+        with h5py.File(path, "r") as f:
+            offsets.append(
+                readers._ContiguousDataset.get_byte_offset(f["data"])
+            )
+            lengths.append(f["data"].shape[0])
+            dtype = f["data"].dtype
+            row_shape = f["data"].shape[1:]
+    return readers._ContiguousDataset(
+        files, offsets, lengths, dtype, row_shape=row_shape
+    )
+
+
+def _slices(length):
+    """Slices that start and end inside, at and across file boundaries."""
+    boundaries = np.cumsum([0] + FILE_LENGTHS)
+    points = sorted(
+        {0, 1, length - 1, length}
+        | set(boundaries.tolist())
+        | set((boundaries[1:-1] - 1).tolist())
+        | set((boundaries[1:-1] + 1).tolist())
+    )
+    return [slice(a, b) for a in points for b in points if a <= b]
+
+
+@pytest.mark.parametrize(
+    "indices",
+    [[], [4], [0, 1, 2, 3], [3, 2, 1], [1, 2, 2, 3], [5, 6, 0, 1, 9, 10, 11]],
+)
+def test_split_contiguous_runs(indices):
+    runs = readers.split_contiguous_runs(indices)
+
+    positions = np.concatenate(runs) if runs else np.array([], dtype=int)
+    np.testing.assert_array_equal(positions, np.arange(len(indices)))
+    for run in runs:
+        assert len(run) > 0
+        np.testing.assert_array_equal(
+            np.diff(np.asarray(indices)[run]), np.ones(len(run) - 1)
+        )
+    # runs are maximal, so consecutive runs can't be merged
+    for prev, run in zip(runs[:-1], runs[1:]):
+        assert indices[run[0]] != indices[prev[-1]] + 1
+
+
+def test_get_byte_offset(tmp_path):
+    arrays = _make_arrays(ROW_SHAPE)
+    (contiguous,) = _write_files(tmp_path / "contiguous", arrays[:1])
+    (chunked,) = _write_files(tmp_path / "chunked", arrays[:1], chunks=4)
+    (empty,) = _write_files(
+        tmp_path / "empty", [np.zeros((0, *ROW_SHAPE), dtype="u2")]
+    )
+
+    with h5py.File(contiguous, "r") as f:
+        assert readers._ContiguousDataset.get_byte_offset(f["data"]) > 0
+    with h5py.File(chunked, "r") as f:
+        assert readers._ContiguousDataset.get_byte_offset(f["data"]) is None
+    with h5py.File(empty, "r") as f:
+        assert readers._ContiguousDataset.get_byte_offset(f["data"]) is None
+
+
+@pytest.mark.parametrize("has_preadv", [True, False])
+@pytest.mark.parametrize("row_shape", [(), ROW_SHAPE])
+def test_contiguous_dataset(tmp_path, monkeypatch, row_shape, has_preadv):
+    if has_preadv and not readers._HAS_PREADV:
+        pytest.skip("os.preadv is not available")
+    monkeypatch.setattr(readers, "_HAS_PREADV", has_preadv)
+    files = _write_files(tmp_path, _make_arrays(row_shape))
+    expected = _read_h5py(files)
+    dataset = _make_contiguous(files)
+
+    assert len(dataset) == len(expected)
+    for i in [*range(len(expected)), -1, -len(expected)]:
+        np.testing.assert_array_equal(dataset[i], expected[i])
+    for s in _slices(len(expected)):
+        out = dataset[s]
+        assert out.dtype == expected.dtype
+        assert out.shape == expected[s].shape
+        np.testing.assert_array_equal(out, expected[s])
+    with pytest.raises(ValueError, match="contiguous"):
+        dataset[0:10:2]
+
+
+@pytest.mark.skipif(not readers._HAS_PREADV, reason="needs os.preadv")
+def test_contiguous_dataset_short_reads(tmp_path, monkeypatch):
+    files = _write_files(tmp_path, _make_arrays(ROW_SHAPE))
+    expected = _read_h5py(files)
+    dataset = _make_contiguous(files)
+    preadv = os.preadv
+    calls = []
+
+    def short_preadv(fd, buffers, offset):
+        # return at most 7 bytes per call, which splits rows and elements
+        calls.append(offset)
+        (buffer,) = buffers
+        return preadv(fd, [memoryview(buffer)[:7]], offset)
+
+    monkeypatch.setattr(os, "preadv", short_preadv)
+    np.testing.assert_array_equal(dataset[5:30], expected[5:30])
+    assert len(calls) > 1
+
+    monkeypatch.setattr(os, "preadv", lambda fd, buffers, offset: 0)
+    with pytest.raises(EOFError):
+        dataset[0:4]
+
+
+def test_cached_dataset(tmp_path):
+    files = _write_files(tmp_path, _make_arrays(ROW_SHAPE))
+    expected = _read_h5py(files)
+    dataset = readers._CachedDataset(
+        _make_contiguous(files), block_size=4, max_bytes=1 << 20
+    )
+
+    assert len(dataset) == len(expected)
+    for i in [*range(len(expected)), -1]:
+        np.testing.assert_array_equal(dataset[i], expected[i])
+    for s in _slices(len(expected)):
+        np.testing.assert_array_equal(dataset[s], expected[s])
+    with pytest.raises(ValueError, match="contiguous"):
+        dataset[0:10:2]
+
+
+def test_cached_dataset_eviction():
+    data = np.arange(40 * 2, dtype=np.int32).reshape(40, 2)
+    block_size = 4
+    block_bytes = block_size * data[0].nbytes
+    dataset = readers._CachedDataset(
+        data, block_size=block_size, max_bytes=2 * block_bytes
+    )
+
+    for i in range(0, 20, block_size):
+        np.testing.assert_array_equal(dataset[i], data[i])
+    assert list(dataset._blocks) == [3, 4]
+    assert dataset._num_bytes == 2 * block_bytes
+
+    # a hit makes the block the most recently used one
+    np.testing.assert_array_equal(dataset[13], data[13])
+    np.testing.assert_array_equal(dataset[20], data[20])
+    assert list(dataset._blocks) == [3, 5]
+
+    # a read spanning more blocks than fit in the cache is still correct
+    np.testing.assert_array_equal(dataset[1:39], data[1:39])
+    assert list(dataset._blocks) == [8, 9]
+
+    # a single block larger than the cache is kept until the next read
+    dataset = readers._CachedDataset(data, block_size=16, max_bytes=1)
+    np.testing.assert_array_equal(dataset[3:20], data[3:20])
+    assert list(dataset._blocks) == [1]
+
+
+@pytest.mark.parametrize("cache_bytes", [0, 1 << 10])
+@pytest.mark.parametrize("chunks", [None, 4])
+def test_sequenced_reader(tmp_path, chunks, cache_bytes):
+    files = _write_files(tmp_path, _make_arrays(ROW_SHAPE), chunks=chunks)
+    expected = _read_h5py(files)
+    reader = readers.H5Reader(str(tmp_path), cache_bytes=cache_bytes)
+
+    vdataset = reader._impl._vdataset
+    if cache_bytes:
+        assert isinstance(vdataset, readers._CachedDataset)
+        vdataset = vdataset._dataset
+    assert isinstance(
+        vdataset,
+        (
+            readers._ContiguousDataset
+            if chunks is None
+            else readers._VirtualDataset
+        ),
+    )
+
+    assert reader.by_sample
+    assert len(reader) == len(expected)
+    for i in range(len(expected)):
+        sample = reader[i]
+        assert sample.dtype == np.int32
+        np.testing.assert_array_equal(sample, expected[i])
+
+
+@pytest.mark.parametrize("read_extra_token", [False, True])
+@pytest.mark.parametrize("cache_bytes", [0, 1 << 10])
+@pytest.mark.parametrize("chunks", [None, 4])
+def test_corpus_reader(tmp_path, chunks, cache_bytes, read_extra_token):
+    files = _write_files(tmp_path, _make_arrays(()), chunks=chunks)
+    expected = _read_h5py(files)
+    msl = 6
+    reader = readers.H5Reader(
+        str(tmp_path),
+        sequence_length=msl,
+        read_extra_token=read_extra_token,
+        cache_bytes=cache_bytes,
+    )
+
+    extra = int(read_extra_token)
+    assert not reader.by_sample
+    assert len(reader) == (len(expected) - extra) // msl
+    for i in range(len(reader)):
+        np.testing.assert_array_equal(
+            reader[i], expected[i * msl : (i + 1) * msl + extra]
+        )
+
+
+def _batch_indices(length, seed=0):
+    """Unsorted indices with duplicates and runs across file boundaries."""
+    rng = np.random.default_rng(seed)
+    indices = [
+        *range(length // 2 - 3, length // 2 + 3),
+        0,
+        0,
+        length - 1,
+        *range(3, 0, -1),
+        *range(length - 4, length),
+        1,
+    ]
+    indices.extend(rng.integers(0, length, size=length).tolist())
+    return indices
+
+
+def _assert_getitems_matches_getitem(dataset, indices):
+    samples = dataset.__getitems__(indices)
+    assert len(samples) == len(indices)
+    for sample, i in zip(samples, indices):
+        expected = dataset[i]
+        assert sample.dtype == expected.dtype
+        np.testing.assert_array_equal(sample, expected)
+
+
+@pytest.mark.parametrize("cache_bytes", [0, 1 << 10])
+@pytest.mark.parametrize("chunks", [None, 4])
+def test_sequenced_reader_getitems(tmp_path, chunks, cache_bytes):
+    _write_files(tmp_path, _make_arrays(ROW_SHAPE), chunks=chunks)
+    reader = readers.H5Reader(str(tmp_path), cache_bytes=cache_bytes)
+    _assert_getitems_matches_getitem(reader, _batch_indices(len(reader)))
+    _assert_getitems_matches_getitem(reader, [])
+
+
+@pytest.mark.parametrize("read_extra_token", [False, True])
+@pytest.mark.parametrize("cache_bytes", [0, 1 << 10])
+@pytest.mark.parametrize("chunks", [None, 4])
+def test_corpus_reader_getitems(
+    tmp_path, chunks, cache_bytes, read_extra_token
+):
+    _write_files(tmp_path, _make_arrays(()), chunks=chunks)
+    reader = readers.H5Reader(
+        str(tmp_path),
+        sequence_length=3,
+        read_extra_token=read_extra_token,
+        cache_bytes=cache_bytes,
+    )
+    _assert_getitems_matches_getitem(reader, _batch_indices(len(reader)))
+
+
+def test_reader_getitems_data_subset(tmp_path):
+    _write_files(tmp_path, _make_arrays(ROW_SHAPE))
+    reader = readers.H5Reader(str(tmp_path), data_subset="0.1-0.4,0.6-0.9")
+    _assert_getitems_matches_getitem(reader, _batch_indices(len(reader)))
+
+
+@pytest.mark.parametrize("interleave", [False, True])
+def test_mixture_getitems(tmp_path, interleave):
+    _write_files(tmp_path / "a", _make_arrays(ROW_SHAPE, seed=1))
+    _write_files(tmp_path / "b", _make_arrays(ROW_SHAPE, seed=2)[:2])
+    mixture = readers.Mixture(
+        [
+            readers.H5Reader(str(tmp_path / "a")),
+            readers.H5Reader(str(tmp_path / "b")),
+        ],
+        [0.3, 0.7],
+        interleave=interleave,
+    )
+    _assert_getitems_matches_getitem(mixture, _batch_indices(len(mixture)))
+
+
+@pytest.mark.skipif(not readers._HAS_PREADV, reason="needs os.preadv")
+def test_contiguous_dataset_concurrent_open(tmp_path, monkeypatch):
+    files = _write_files(tmp_path, _make_arrays(ROW_SHAPE))
+    expected = _read_h5py(files)
+    dataset = _make_contiguous(files)
+    num_threads = 8
+    barrier = threading.Barrier(num_threads)
+    opened = []
+    os_open = os.open
+
+    def slow_open(path, flags):
+        # widen the window in which threads race to open the files
+        time.sleep(0.01)
+        fd = os_open(path, flags)
+        opened.append(fd)
+        return fd
+
+    monkeypatch.setattr(os, "open", slow_open)
+
+    def read(i):
+        barrier.wait()
+        return dataset[i : i + 10]
+
+    with ThreadPoolExecutor(num_threads) as executor:
+        outputs = list(executor.map(read, range(num_threads)))
+    for i, out in enumerate(outputs):
+        np.testing.assert_array_equal(out, expected[i : i + 10])
+    assert len(opened) == len(files)
@@ -35,6 +35,22 @@ logger = logging.getLogger(__file__)
 logger.setLevel(logging.INFO)
 
 
+def _check_dtype_range(data, dtype, file_path):
+    """Raises an error if `data` holds values that `dtype` can't represent.
+
+    HDF5 silently wraps integers that overflow the dataset dtype, after which
+    the corruption can't be detected when verifying the written files.
+    """
+    info = np.iinfo(dtype)
+    if data.size and (data.min() < info.min or data.max() > info.max):
+        raise ValueError(
+            f"Token ids in range [{data.min()}, {data.max()}] can't be "
+            f"stored as `{np.dtype(dtype)}` in {file_path}. Please ensure "
+            f"that a correct tokenizer is used and that the eos_id and pad_id "
+            f"are within the tokenizer vocabulary."
+        )
+
+
 class HDF5BasePreprocessor(ABC):
     """
     This module defines how to process a dataset, tokenize it and write into HDF5 format.
@@ -136,6 +152,34 @@ class HDF5BasePreprocessor(ABC):
         self.seed = params.pop("seed", 0)
         self.write_in_batch = params.pop("write_in_batch", False)
 
+        # Uncompressed output is written with a contiguous layout, which
+        # lets the HDF5 readers bypass h5py at train time. Compression
+        # requires chunking, and LZ4 decompresses much faster than gzip.
+        self.compression = params.pop("compression", None)
+        if self.compression not in [None, "gzip", "lz4"]:
+            raise ValueError(
+                f"Unsupported compression {self.compression}. Expected one of "
+                f"None, `gzip` or `lz4`."
+            )
+
+        # Number of samples per HDF5 chunk. By default, pick the power of two
+        # that brings a chunk closest to 1 MiB so that a batch read at train
+        # time touches few chunks, each of which is cheap to cache.
+        self.chunk_samples = params.pop("chunk_samples", None)
+        if self.chunk_samples is None and self.compression is not None:
+            itemsize = np.dtype(self.get_hdf5_dtype()).itemsize
+            sample_bytes = 3 * self.max_seq_length * itemsize
+            self.chunk_samples = 2 ** max(
+                0, int(round(np.log2((1 << 20) / sample_bytes)))
+            )
+        if self.chunk_samples is None:
+            logger.info("Writing uncompressed HDF5 files, contiguous layout.")
+        else:
+            logger.info(
+                f"Writing HDF5 files with {self.compression} compression and "
+                f"chunk shape ({self.chunk_samples}, 3, {self.max_seq_length})."
+            )
+
         self.split_text_to_tokenize = params.pop(
             "split_text_to_tokenize", False
         )
@@ -206,6 +250,36 @@ class HDF5BasePreprocessor(ABC):
 
         return vocab_size
 
+    def get_hdf5_dtype(self):
+        """ Get the smallest data type that holds every value of the samples
+        Returns:
+            dtype (str): data type for the HDF5 dataset
+        """
+        special_ids = [i for i in [self.eos_id, self.pad_id] if i is not None]
+        if any(i < 0 for i in special_ids):
+            logger.warning(
+                f"Special token ids {special_ids} can't be stored as unsigned "
+                f"integers, falling back to `int32` for the HDF5 files."
+            )
+            return "i4"
+
+        if self.tokenizer_type == "huggingfacetokenizer":
+            # `vocab_size` of HF tokenizers excludes added tokens, whose ids
+            # come after those of the base vocabulary
+            num_ids = len(self.tokenizer)
+        else:
+            num_ids = self.get_vocab_size()
+        max_id = max([num_ids - 1] + special_ids)
+        if max_id < 2 ** 16:
+            return "u2"
+        elif max_id < 2 ** 32:
+            return "u4"
+        else:
+            raise ValueError(
+                f"only token ids up to 2^32 - 1 are currently supported, got "
+                f"{max_id}"
+            )
+
     def seed_runs(self, rank=0):
         """Set seed for run based on user provided seed and rank.
 
@@ -230,7 +304,7 @@ class HDF5BasePreprocessor(ABC):
         n_examples,
         chunks,
         dtype="i4",
-        compression="gzip",
+        compression=None,
     ):
         """Write data to HDF5 file.
 
@@ -239,10 +313,25 @@ class HDF5BasePreprocessor(ABC):
             files (sequence): List of lists containing tokenized data to write.
             rng (random.Random obj): Instance of random object, with states set.
             n_examples (int): Number of examples that will be written in the file.
-            chunks (tuple or bool): Chunk shape, or True to enable auto-chunking.
+            chunks (tuple or bool): Chunk shape, True to enable auto-chunking,
+                or None for a contiguous layout.
             dtype (string): Data type for the HDF5 dataset.
-            compression (string): Compression strategy.
+            compression (string): Compression strategy, one of None, `gzip`
+                or `lz4`. `lz4` requires the `hdf5plugin` package.
         """
+        if compression == "lz4":
+            try:
+                import hdf5plugin
+            except ImportError:
+                raise ImportError(
+                    "`compression: lz4` requires the `hdf5plugin` package, "
+                    "please install it with `pip install hdf5plugin`."
+                )
+
+            compression_kwargs = dict(hdf5plugin.LZ4())
+        else:
+            compression_kwargs = {"compression": compression}
+
         data_label = "data"
         data_shape = (n_examples, 3, self.max_seq_length)
         data_buffer = files
@@ -251,6 +340,7 @@ class HDF5BasePreprocessor(ABC):
             # doesn't allow storing such format
             # https://docs.h5py.org/en/stable/strings.html#what-about-numpy-s-u-type
             _data = np.stack(data_buffer)
+            _check_dtype_range(_data, dtype, file_path)
             with h5py.File(file_path, mode="w") as h5_file:
                 h5_file.attrs["n_examples"] = n_examples
                 h5_file.create_dataset(
@@ -258,9 +348,13 @@ class HDF5BasePreprocessor(ABC):
                     data=_data,
                     dtype=dtype,
                     chunks=chunks,
-                    compression=compression,
+                    **compression_kwargs,
                 )
         else:
+            # Write blocks of samples at a time, which bounds the extra memory
+            # needed to stack samples while avoiding one small HDF5 write per
+            # sample.
+            block_size = 1024
             with h5py.File(file_path, mode="w") as h5_file:
                 h5_file.attrs["n_examples"] = n_examples
                 dset = h5_file.create_dataset(
@@ -268,10 +362,12 @@ class HDF5BasePreprocessor(ABC):
                     shape=data_shape,
                     dtype=dtype,
                     chunks=chunks,
-                    compression=compression,
+                    **compression_kwargs,
                 )
-                for idx, f in enumerate(data_buffer):
-                    dset[idx] = f
+                for start in range(0, len(data_buffer), block_size):
+                    block = np.stack(data_buffer[start : start + block_size])
+                    _check_dtype_range(block, dtype, file_path)
+                    dset[start : start + len(block)] = block
 
     def write_hdf5_files(
         self,
@@ -311,8 +407,14 @@ class HDF5BasePreprocessor(ABC):
             remainder = []
             files_per_record = len(file_chunks[-1])
 
-        hdf5_chunk_size = (1, 3, self.max_seq_length)
-        hdf5_dtype = "i4"
+        hdf5_chunk_size = None
+        if self.chunk_samples is not None:
+            hdf5_chunk_size = (
+                min(self.chunk_samples, files_per_record),
+                3,
+                self.max_seq_length,
+            )
+        hdf5_dtype = self.get_hdf5_dtype()
 
         for files in file_chunks:
             fp = f"{self.output_dir}/{self.output_name}_{start_number}"
@@ -326,6 +428,7 @@ class HDF5BasePreprocessor(ABC):
                 n_examples=files_per_record,
                 chunks=hdf5_chunk_size,
                 dtype=hdf5_dtype,
+                compression=self.compression,
             )
 
             start_number += 1
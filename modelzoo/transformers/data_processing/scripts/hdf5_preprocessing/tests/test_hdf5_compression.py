@@ -0,0 +1,91 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Round-trip tests for compressed HDF5 files written by the preprocessors."""
+
+import random
+from types import SimpleNamespace
+
+import h5py
+import numpy as np
+import pytest
+
+pytest.importorskip("hdf5plugin")
+
+from modelzoo.transformers.data_processing.h5_map_dataset import readers
+from modelzoo.transformers.data_processing.scripts.hdf5_preprocessing import (
+    hdf5_base_preprocessor as base,
+)
+
+MAX_SEQ_LENGTH = 16
+N_EXAMPLES = 37
+
+
+def _write(path, samples, compression, chunks, write_in_batch):
+    # Only the attributes read by `write_hdf5_file` are needed.
+    preprocessor = SimpleNamespace(
+        max_seq_length=MAX_SEQ_LENGTH, write_in_batch=write_in_batch
+    )
+    base.HDF5BasePreprocessor.write_hdf5_file(
+        preprocessor,
+        file_path=str(path),
+        files=list(samples),
+        rng=random.Random(0),
+        n_examples=len(samples),
+        chunks=chunks,
+        dtype="u2",
+        compression=compression,
+    )
+
+
+@pytest.mark.parametrize("write_in_batch", [True, False])
+@pytest.mark.parametrize("chunks", [(1, 3, MAX_SEQ_LENGTH), True])
+@pytest.mark.parametrize("compression", ["lz4", "gzip"])
+def test_compressed_round_trip(tmp_path, compression, chunks, write_in_batch):
+    rng = np.random.default_rng(0)
+    samples = rng.integers(
+        0, 2 ** 16, size=(N_EXAMPLES, 3, MAX_SEQ_LENGTH)
+    ).astype(np.uint16)
+    _write(
+        tmp_path / "data-00000.h5", samples, compression, chunks, write_in_batch
+    )
+
+    with h5py.File(tmp_path / "data-00000.h5", "r") as f:
+        assert f.attrs["n_examples"] == N_EXAMPLES
+        assert f["data"].chunks is not None
+        readers.check_filters_available(f["data"])
+        np.testing.assert_array_equal(f["data"][()], samples)
+
+    reader = readers.H5Reader(str(tmp_path))
+    assert len(reader) == N_EXAMPLES
+    for i in range(N_EXAMPLES):
+        np.testing.assert_array_equal(reader[i], samples[i])
+    indices = [5, 6, 7, 0, 36, 36, 12]
+    for sample, i in zip(reader.__getitems__(indices), indices):
+        np.testing.assert_array_equal(sample, samples[i])
+
+
+def test_missing_filter_raises(tmp_path, monkeypatch):
+    samples = np.zeros((4, 3, MAX_SEQ_LENGTH), dtype=np.uint16)
+    _write(
+        tmp_path / "data-00000.h5",
+        samples,
+        "lz4",
+        (1, 3, MAX_SEQ_LENGTH),
+        write_in_batch=True,
+    )
+    # Simulate a process in which `hdf5plugin` was never imported.
+    monkeypatch.setattr(h5py.h5z, "filter_avail", lambda filter_id: False)
+    with pytest.raises(ImportError, match="hdf5plugin"):
+        readers.H5Reader(str(tmp_path))
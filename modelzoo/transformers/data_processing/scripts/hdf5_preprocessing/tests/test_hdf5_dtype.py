@@ -0,0 +1,98 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the dtype of the HDF5 files written by the preprocessors."""
+
+import random
+from types import SimpleNamespace
+
+import h5py
+import numpy as np
+import pytest
+
+from modelzoo.transformers.data_processing.scripts.hdf5_preprocessing import (
+    hdf5_base_preprocessor as base,
+)
+from modelzoo.transformers.data_processing.scripts.hdf5_preprocessing.utils import (
+    verify_saved_hdf5_files,
+)
+
+
+class _HFTokenizer:
+    """Mimics a HF tokenizer, whose `vocab_size` excludes added tokens."""
+
+    def __init__(self, vocab_size, num_added_tokens):
+        self.vocab_size = vocab_size
+        self.num_added_tokens = num_added_tokens
+
+    def __len__(self):
+        return self.vocab_size + self.num_added_tokens
+
+
+def _get_hdf5_dtype(tokenizer, eos_id, pad_id=None):
+    preprocessor = SimpleNamespace(
+        tokenizer_type="huggingfacetokenizer",
+        tokenizer=tokenizer,
+        eos_id=eos_id,
+        pad_id=eos_id if pad_id is None else pad_id,
+    )
+    preprocessor.get_vocab_size = lambda: tokenizer.vocab_size
+    return base.HDF5BasePreprocessor.get_hdf5_dtype(preprocessor)
+
+
+@pytest.mark.parametrize(
+    "vocab_size, num_added_tokens, eos_id, expected",
+    [
+        (50257, 0, 50256, "u2"),
+        (2 ** 16, 0, 0, "u2"),
+        # added tokens push the largest id past what `u2` can hold
+        (2 ** 16 - 4, 8, 0, "u4"),
+        (2 ** 16, 1, 0, "u4"),
+        (1000, 0, 2 ** 16, "u4"),
+        (1000, 0, -1, "i4"),
+    ],
+)
+def test_get_hdf5_dtype(vocab_size, num_added_tokens, eos_id, expected):
+    tokenizer = _HFTokenizer(vocab_size, num_added_tokens)
+    assert _get_hdf5_dtype(tokenizer, eos_id) == expected
+
+
+@pytest.mark.parametrize("write_in_batch", [True, False])
+def test_write_rejects_overflowing_ids(tmp_path, write_in_batch):
+    samples = np.zeros((4, 3, 8), dtype=np.int64)
+    samples[2, 0, 5] = 2 ** 16
+    preprocessor = SimpleNamespace(
+        max_seq_length=8, write_in_batch=write_in_batch
+    )
+    with pytest.raises(ValueError, match="can't be stored"):
+        base.HDF5BasePreprocessor.write_hdf5_file(
+            preprocessor,
+            file_path=str(tmp_path / "data-00000.h5"),
+            files=list(samples),
+            rng=random.Random(0),
+            n_examples=len(samples),
+            chunks=None,
+            dtype="u2",
+        )
+
+
+def test_verify_accepts_file_without_examples(tmp_path):
+    file_path = str(tmp_path / "data-00000.h5")
+    with h5py.File(file_path, "w") as f:
+        f.attrs["n_examples"] = 0
+        f.create_dataset("data", data=np.zeros((0, 3, 8), dtype="u2"))
+    args = SimpleNamespace(max_seq_length=8, eos_id=0, pad_id=0)
+    stats = verify_saved_hdf5_files(([file_path], args, 1000))
+    assert stats.num_sequences == 0
+    assert stats.num_tokens == 0
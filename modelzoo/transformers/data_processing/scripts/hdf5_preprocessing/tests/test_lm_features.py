@@ -0,0 +1,55 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the LM features built by `create_features_auto_lm`."""
+
+import random
+
+import numpy as np
+import pytest
+
+from modelzoo.transformers.data_processing.scripts.hdf5_preprocessing.utils import (
+    create_features_auto_lm,
+)
+
+
+def _reference_features(token_ids, max_sequence_length, inverted_mask, pad_id):
+    """The list-based packing that `create_features_auto_lm` replaced."""
+    input_ids = list(token_ids[:-1])
+    labels = list(token_ids[1:])
+    input_mask = [1] * len(input_ids)
+    num_pad = max_sequence_length - len(input_ids)
+    input_ids.extend([pad_id] * num_pad)
+    labels.extend([pad_id] * num_pad)
+    input_mask.extend([0] * num_pad)
+    if inverted_mask:
+        input_mask = [1 - m for m in input_mask]
+    return np.array([input_ids, input_mask, labels], dtype=np.int32)
+
+
+@pytest.mark.parametrize("num_token_ids", [0, 1, 2, 5, 9])
+@pytest.mark.parametrize("inverted_mask", [False, True])
+def test_create_features_auto_lm(num_token_ids, inverted_mask):
+    token_ids = list(range(3, 3 + num_token_ids))
+    features = create_features_auto_lm(
+        list(token_ids),
+        max_sequence_length=8,
+        inverted_mask=inverted_mask,
+        pad_id=1,
+        min_len=0,
+        rng=random.Random(0),
+    )
+    expected = _reference_features(token_ids, 8, inverted_mask, pad_id=1)
+    assert features.dtype == expected.dtype
+    np.testing.assert_array_equal(features, expected)
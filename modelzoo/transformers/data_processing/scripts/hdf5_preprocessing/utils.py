@@ -33,6 +33,9 @@ import zstandard
 from lm_dataformat import listdir_or_file, tarfile_reader
 from tqdm import tqdm
 
+from modelzoo.transformers.data_processing.h5_map_dataset.readers import (
+    check_filters_available,
+)
 from modelzoo.transformers.data_processing.utils import split_list
 
 logger = logging.getLogger("utils")
@@ -157,6 +160,21 @@ def add_common_args(parser):
         "setting to false will save memory but a bit slower. Defaults to "
         "`True`.",
     )
+    parser.add_argument(
+        "--compression",
+        type=str,
+        choices=["gzip", "lz4"],
+        help="Compression for the HDF5 files. Uncompressed files are larger "
+        "but fastest to read; `lz4` (requires `hdf5plugin`) decompresses much "
+        "faster than `gzip`. Defaults to no compression.",
+    )
+    parser.add_argument(
+        "--chunk_samples",
+        type=int,
+        help="Number of samples per HDF5 chunk. Defaults to a contiguous "
+        "layout for uncompressed files, otherwise to the power of two that "
+        "makes a chunk closest to 1 MiB.",
+    )
     parser.add_argument(
         "--write_remainder",
         type=str,
@@ -305,6 +323,8 @@ def update_params(params, args):
         "output_name",
         "files_per_record",
         "write_in_batch",
+        "compression",
+        "chunk_samples",
         "write_remainder",
         "resume_from_checkpoint",
         "display_pbar",
@@ -569,9 +589,10 @@ def collect_stats(data_arr, args):
     """
     num_sequences = data_arr.shape[0]
     num_tokens = data_arr.shape[0] * data_arr.shape[2]
-    non_pad_tokens = np.logical_and(
-        data_arr[:, 0, :] != args.eos_id, data_arr[:, 0, :] != args.pad_id
-    ).sum()
+    input_ids = data_arr[:, 0, :]
+    non_pad_tokens = np.count_nonzero(
+        (input_ids != args.eos_id) & (input_ids != args.pad_id)
+    )
     loss_valid_tokens = data_arr[:, 1, :].sum()
     detokenized_bytes = 0
     detokenized_chars = 0
@@ -608,13 +629,22 @@ def verify_saved_hdf5_files(params):
         with h5py.File(h5_file_path, mode="r") as h5_file:
             n_examples = h5_file.attrs["n_examples"]
             dataset = h5_file["data"]
-            data_arr = dataset[()]
-            expected_dtype = "i4"
-            assert dataset.dtype == expected_dtype, (
+            check_filters_available(dataset)
+            expected_dtypes = ["u2", "u4", "i4"]
+            assert dataset.dtype in expected_dtypes, (
                 f"Error in {h5_file}, conversion is corrupted as the "
-                f"datatype is unexpected. Expected: {expected_dtype}, "
+                f"datatype is unexpected. Expected one of: {expected_dtypes}, "
                 f"received {dataset.dtype}."
             )
+            # token ids that overflowed the dtype have wrapped around on
+            # write and are indistinguishable from valid ids, so check that
+            # the dtype can hold the whole vocabulary
+            assert np.iinfo(dataset.dtype).max >= vocab_size - 1, (
+                f"Error in {h5_file}, conversion is corrupted as the "
+                f"datatype {dataset.dtype} can't hold the token ids of a "
+                f"vocabulary of size {vocab_size}."
+            )
+            data_arr = dataset[()].astype(np.int32)
             data_shape = data_arr.shape
             assert (
                 data_shape[1:] == (3, args.max_seq_length)
@@ -624,7 +654,7 @@ def verify_saved_hdf5_files(params):
                 f"shape of example is unexpected. Expected:"
                 f" {(3, args.max_seq_length)}, received {data_shape[1:]}."
             )
-            assert (data_arr < vocab_size).all(), (
+            assert data_arr.size == 0 or data_arr.max() < vocab_size, (
                 f"Error in {h5_file}, conversion is corrupted as the "
                 f"input ids are greater than vocab size."
                 f"Please ensure that a correct tokenizer is used "
@@ -663,30 +693,28 @@ def verify_saved_hdf5_files_mp(files, args, vocab_size):
     if args.processes == 1:
         return verify_saved_hdf5_files((files, args, vocab_size))
 
-    try:
-        n_proc = args.processes
-        n_chunks = ceil(len(files) / n_proc)
-        remain = len(files) % n_proc
-        if n_chunks == 1 and remain:
-            n_proc = remain
-            logger.warning(
-                f"There aren't enough files to distribute to {args.processes} "
-                f"processes, resetting it to {n_proc}."
-            )
-        files = split_list(files, n_chunks)
-    except ValueError as e:
-        # We hit errors in one potential scenario:
-        # Files is an empty list, in which case there is nothing to split
-        logger.error(e)
-        raise
+    if not files:
+        error = "There are no HDF5 files to verify."
+        logger.error(error)
+        raise ValueError(error)
+
+    n_proc = args.processes
+    if len(files) < n_proc:
+        n_proc = len(files)
+        logger.warning(
+            f"There aren't enough files to distribute to {args.processes} "
+            f"processes, resetting it to {n_proc}."
+        )
 
     dataset_stats = DatasetStats(0, 0, 0, 0, 0, 0)
 
+    # Verify one file per task, so that workers which get faster files keep
+    # pulling work instead of idling behind a fixed split of the files.
     with Pool(processes=n_proc) as pool:
         pbar = tqdm(desc="Verifying HDF5 files", total=len(files),)
-        for stats in pool.imap(
+        for stats in pool.imap_unordered(
             verify_saved_hdf5_files,
-            zip(files, repeat(args), repeat(vocab_size),),
+            zip(([f] for f in files), repeat(args), repeat(vocab_size),),
         ):
             dataset_stats.num_sequences += stats.num_sequences
             dataset_stats.num_tokens += stats.num_tokens
@@ -879,37 +907,31 @@ def create_features_auto_lm(
     if rng.random() < short_seq_prob:
         token_ids = token_ids[0 : rng.randint(2, max_sequence_length - 1)]
 
-    input_ids = token_ids[:-1]
-    labels = token_ids[1:]
-    input_mask = [1] * len(input_ids)
-
-    # padding
-    num_pad = max_sequence_length - len(input_ids)
-    padding = [pad_id] * num_pad
-
-    input_ids.extend(padding)
-    labels.extend(padding)
-    input_mask.extend([0] * num_pad)
+    # assertion to ensure correct output shapes. Fewer than two token ids
+    # produce no input/label pair, i.e. a sample that is all padding
+    num_tokens = max(len(token_ids) - 1, 0)
+    assert num_tokens <= max_sequence_length, "Wrong sequence length"
 
-    # assertions to ensure correct output shapes
-    assert (
-        len(input_ids) == max_sequence_length
-        and len(labels) == max_sequence_length
-        and len(input_mask) == max_sequence_length
-    ), "Wrong sequence length"
-
-    # create feature dict
-    features = dict()
-    features["input_ids"] = getattr(np, input_ids_dtype)(input_ids)
-    features["input_mask"] = getattr(np, input_mask_dtype)(input_mask)
+    # Write input ids, input mask and labels directly into a preallocated
+    # array of the padded shape instead of padding python lists and stacking
+    sample = np.empty(
+        (3, max_sequence_length),
+        dtype=np.result_type(input_ids_dtype, input_mask_dtype, labels_dtype),
+    )
+    sample[0, :num_tokens] = np.asarray(
+        token_ids[:num_tokens], dtype=input_ids_dtype
+    )
+    sample[1, :num_tokens] = 0 if inverted_mask else 1
+    sample[2, :num_tokens] = np.asarray(
+        token_ids[1 : num_tokens + 1], dtype=labels_dtype
+    )
 
-    if inverted_mask:
-        features["input_mask"] = np.equal(features["input_mask"], 0).astype(
-            features["input_mask"].dtype
-        )
-    labels = getattr(np, labels_dtype)(labels)
+    # padding
+    sample[0, num_tokens:] = getattr(np, input_ids_dtype)(pad_id)
+    sample[1, num_tokens:] = 1 if inverted_mask else 0
+    sample[2, num_tokens:] = getattr(np, labels_dtype)(pad_id)
 
-    return np.stack([features["input_ids"], features["input_mask"], labels])
+    return sample
 
 
 def create_features_summarization(
@@ -15,11 +15,17 @@
 import argparse
 import glob
 import os
+import sys
 import time
 
 import h5py
 import numpy as np
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../../../.."))
+from modelzoo.transformers.data_processing.h5_map_dataset.readers import (
+    check_filters_available,
+)
+
 
 def shuffle_dataset(args):
     np.random.seed(seed=115 + args.worker_id)
@@ -70,6 +76,7 @@ def shuffle_dataset(args):
         for i in range(args.num_output_chunks):
             chunk_samples.append([])
         h5file = h5py.File(h5filename, 'r')
+        check_filters_available(h5file['data'])
         num_samples = h5file['data'].shape[0]
         out_chunk_ids = np.random.choice(
             np.arange(args.num_output_chunks), size=num_samples
@@ -17,16 +17,15 @@ import os
 
 def set_defaults(params, mode=None):
     for section in ["train_input", "eval_input"]:
-        for key in ["vocab_file"]:
-            if params.get(section, {}).get(key):
-                params[section][key] = os.path.abspath(params[section][key])
+        input_params = params.get(section, {})
+        if input_params.get("vocab_file"):
+            input_params["vocab_file"] = os.path.abspath(
+                input_params["vocab_file"]
+            )
 
-    params["model"]["layer_norm_epsilon"] = params["model"].get(
-        "layer_norm_epsilon", 1.0e-5
-    )
+    model_params = params["model"]
+    model_params.setdefault("layer_norm_epsilon", 1.0e-5)
     data_processor = params["train_input"]["data_processor"]
-    params["model"]["is_mnli_dataset"] = "MNLI" in data_processor
-    params["model"]["use_bfloat16"] = params["model"].get("use_bfloat16", False)
-    params["optimizer"]["log_summaries"] = params["optimizer"].get(
-        "log_summaries", False
-    )
+    model_params["is_mnli_dataset"] = "MNLI" in data_processor
+    model_params.setdefault("use_bfloat16", False)
+    params["optimizer"].setdefault("log_summaries", False)
@@ -74,13 +74,6 @@ class BertSummarizationModel(torch.nn.Module):
                 "RougeScoreMetric not yet supported in weight streaming"
             )
 
-            self.rouge1_score = RougeScoreMetric(
-                max_n=1, vocab_file=self.vocab_file, name="eval/rouge1"
-            )
-            self.rouge2_score = RougeScoreMetric(
-                max_n=2, vocab_file=self.vocab_file, name="eval/rouge2"
-            )
-
     def forward(self, data):
         logits = self.model(
             input_ids=data["input_ids"],
@@ -89,19 +82,6 @@ class BertSummarizationModel(torch.nn.Module):
             cls_tokens_positions=data["cls_indices"],
         )
         loss = self.loss_fn(
-            logits, data["labels"], data["cls_weights"].clone().to(logits.dtype)
+            logits, data["labels"], data["cls_weights"].to(logits.dtype)
         )
-        if not self.model.training and self.compute_eval_metrics:
-            labels = data["labels"].clone()
-            predictions = logits.argmax(-1).int()
-            input_ids = data["input_ids"].clone()
-            cls_indices = data["cls_indices"].clone()
-            cls_weights = data["cls_weights"].clone()
-            self.rouge1_score(
-                labels, predictions, cls_indices, cls_weights, input_ids,
-            )
-            self.rouge2_score(
-                labels, predictions, cls_indices, cls_weights, input_ids,
-            )
-
         return loss
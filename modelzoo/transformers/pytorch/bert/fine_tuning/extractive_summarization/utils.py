@@ -17,15 +17,14 @@ import os
 
 def set_defaults(params, mode=None):
     for section in ["train_input", "eval_input"]:
-        for key in ["vocab_file"]:
-            if params.get(section, {}).get(key):
-                params[section][key] = os.path.abspath(params[section][key])
+        input_params = params.get(section, {})
+        if input_params.get("vocab_file"):
+            input_params["vocab_file"] = os.path.abspath(
+                input_params["vocab_file"]
+            )
 
-    params["model"]["loss_weight"] = params["model"].get("loss_weight", 1.0)
-    params["model"]["layer_norm_epsilon"] = params["model"].get(
-        "layer_norm_epsilon", 1.0e-5
-    )
-    params["model"]["vocab_file"] = params["eval_input"]["vocab_file"]
-    params["optimizer"]["log_summaries"] = params["optimizer"].get(
-        "log_summaries", False
-    )
+    model_params = params["model"]
+    model_params.setdefault("loss_weight", 1.0)
+    model_params.setdefault("layer_norm_epsilon", 1.0e-5)
+    model_params["vocab_file"] = params["eval_input"]["vocab_file"]
+    params["optimizer"].setdefault("log_summaries", False)
@@ -17,26 +17,25 @@ import os
 
 def set_defaults(params, mode=None):
     for section in ["train_input", "eval_input"]:
-        for key in ["vocab_file"]:
-            if params.get(section, {}).get(key):
-                params[section][key] = os.path.abspath(params[section][key])
+        input_params = params.get(section, {})
+        if input_params.get("vocab_file"):
+            input_params["vocab_file"] = os.path.abspath(
+                input_params["vocab_file"]
+            )
 
-    params["model"]["layer_norm_epsilon"] = params["model"].get(
-        "layer_norm_epsilon", 1.0e-5
-    )
-    params["model"]["label_vocab_file"] = params["train_input"].get(
+    model_params = params["model"]
+    train_input_params = params["train_input"]
+    model_params.setdefault("layer_norm_epsilon", 1.0e-5)
+    model_params["label_vocab_file"] = train_input_params.get(
         "label_vocab_file", None
     )
     # If set to `False`, `pad` token loss will not contribute to loss.
-    include_padding_in_loss = params["model"].get(
+    include_padding_in_loss = model_params.setdefault(
         "include_padding_in_loss", False
     )
-    params["model"]["include_padding_in_loss"] = include_padding_in_loss
-    loss_weight = params["model"].get("loss_weight", 1.0)
+    loss_weight = model_params.get("loss_weight", 1.0)
     if include_padding_in_loss:
-        max_sequence_length = params["train_input"]["max_sequence_length"]
+        max_sequence_length = train_input_params["max_sequence_length"]
         loss_weight *= 1.0 / max_sequence_length
-    params["model"]["loss_weight"] = loss_weight
-    params["optimizer"]["log_summaries"] = params["optimizer"].get(
-        "log_summaries", False
-    )
+    model_params["loss_weight"] = loss_weight
+    params["optimizer"].setdefault("log_summaries", False)
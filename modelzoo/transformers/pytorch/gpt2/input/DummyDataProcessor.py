@@ -32,29 +32,40 @@ class DummyDataset(torch.utils.data.Dataset):
         self.max_seq_len = 128
         self.vocab_size = 32000
         np.random.seed(seed=0)
-        self.data = dict()
 
-        input_mask = np.zeros((self.length, self.max_seq_len), dtype=np.int32)
+        # Padding starts at one of `max_seq_len / 2 + 1` positions, so every
+        # attention mask is one of as many templates. Only the template index
+        # of each sample is stored, and padded input ids are zeroed on read.
         seq_mid_idx = np.cast["int32"](self.max_seq_len / 2)
-        for i in range(self.length):
-            start_idx = np.random.randint(seq_mid_idx, self.max_seq_len + 1)
-            input_mask[i, start_idx : self.max_seq_len] = 1
-        self.data["attention_mask"] = 1 - input_mask
-
-        self.data["input_ids"] = np.random.randint(
-            low=0,
-            high=self.vocab_size,
-            size=(self.length, self.max_seq_len),
-            dtype=np.int32,
-        ) * (1 - input_mask)
+        start_idx = np.random.randint(
+            seq_mid_idx, self.max_seq_len + 1, size=self.length
+        )
+        self._mask_index = torch.from_numpy(start_idx - seq_mid_idx)
+        positions = torch.arange(self.max_seq_len)
+        starts = torch.arange(int(seq_mid_idx), self.max_seq_len + 1)
+        self._mask_templates = (positions[None, :] < starts[:, None]).to(
+            torch.int32
+        )
+
+        self._input_ids = torch.from_numpy(
+            np.random.randint(
+                low=0,
+                high=self.vocab_size,
+                size=(self.length, self.max_seq_len),
+                dtype=np.int32,
+            )
+        )
 
         super(DummyDataset, self).__init__()
 
     def __getitem__(self, index):
+        # `index` may also be a list of indices, which returns a whole batch.
+        attention_mask = self._mask_templates[self._mask_index[index]]
+        input_ids = self._input_ids[index] * attention_mask
         feature = {
-            "input_ids": self.data["input_ids"][index],
-            "attention_mask": self.data["attention_mask"][index],
-            "labels": self.data["input_ids"][index],
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "labels": input_ids,
         }
         return feature
 
@@ -82,3 +93,22 @@ class DummyDataProcessor(GenericDataProcessor):
     def __init__(self, params):
         self.dataset = DummyDataset()
         super().__init__(params)
+
+    def _get_dataloader_kwargs(self):
+        kwargs = super()._get_dataloader_kwargs()
+        if self.data_collator is not None:
+            # A collator expects a list of samples, so batches are fetched
+            # one sample at a time.
+            return kwargs
+
+        # The dataset is held in memory, so each batch is fetched with a
+        # single index into its tensors instead of collating `batch_size`
+        # samples.
+        kwargs["sampler"] = torch.utils.data.BatchSampler(
+            kwargs["sampler"],
+            batch_size=kwargs["batch_size"],
+            drop_last=kwargs["drop_last"],
+        )
+        kwargs["batch_size"] = None
+        kwargs["drop_last"] = False
+        return kwargs
@@ -84,6 +84,22 @@ class GptHDF5MapDataProcessor:
             - "sort_files" (bool): whether or not the reader should sort the input
                 files. This is included for backwards compatibility and should
                 almost always be set to `True`.
+            - "cache_bytes" (int): the maximum number of bytes of data read
+                from disk that each dataloader process keeps in an in-memory
+                LRU cache. Useful for multi-epoch runs where the same data is
+                read repeatedly. Defaults to 0, which disables caching.
+            - "num_read_threads" (int): the number of background threads each
+                dataloader process uses to read the samples of a batch from
+                disk while the map function is applied to samples that were
+                already read. Defaults to 0, which reads every sample
+                synchronously.
+            - "chunk_cache_bytes" (int): the size in bytes of the HDF5 chunk
+                cache used when reading chunked files. Defaults to four times
+                the size of a chunk, and at least 1 MiB. Has no effect on
+                contiguous files, which are read directly from disk.
+            - "chunk_cache_slots" (int): the number of hash table slots of the
+                HDF5 chunk cache, ideally a prime number. Defaults to the HDF5
+                default.
     """
 
     def __init__(self, params):
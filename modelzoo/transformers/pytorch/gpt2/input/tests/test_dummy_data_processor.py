@@ -0,0 +1,101 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests that the batched `DummyDataProcessor` loader matches per-sample
+loading through `GenericDataProcessor`.
+"""
+
+import pytest
+import torch
+
+pytest.importorskip("cerebras_pytorch")
+
+from modelzoo.transformers.data_processing.GenericDataProcessor import (
+    GenericDataProcessor,
+)
+from modelzoo.transformers.pytorch.gpt2.input.DummyDataProcessor import (
+    DummyDataProcessor,
+)
+
+NUM_BATCHES = 5
+
+
+def _make_processor(**params):
+    return DummyDataProcessor(
+        {"batch_size": 16, "shuffle": True, "shuffle_seed": 1, **params}
+    )
+
+
+def _batches(data_loader):
+    return [batch for _, batch in zip(range(NUM_BATCHES), data_loader)]
+
+
+def _per_sample_loader(processor):
+    return torch.utils.data.DataLoader(
+        processor.dataset,
+        **GenericDataProcessor._get_dataloader_kwargs(processor),
+    )
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_batches_match_per_sample_loader(num_workers):
+    processor = _make_processor(num_workers=num_workers)
+    batches = _batches(processor.create_dataloader())
+    expected = _batches(_per_sample_loader(processor))
+
+    assert len(batches) == NUM_BATCHES
+    for batch, expected_batch in zip(batches, expected):
+        assert batch.keys() == expected_batch.keys()
+        for key in expected_batch:
+            assert batch[key].shape == (16, 128)
+            assert batch[key].dtype == expected_batch[key].dtype
+            torch.testing.assert_close(
+                batch[key], expected_batch[key], rtol=0, atol=0
+            )
+        # input ids are padded where the attention mask is zero
+        mask = batch["attention_mask"]
+        assert ((mask == 0) | (mask == 1)).all()
+        assert (batch["input_ids"][mask == 0] == 0).all()
+        # padding is a suffix of every sequence
+        assert (mask[:, 1:] <= mask[:, :-1]).all()
+
+
+def test_data_collator_is_used():
+    collated = []
+
+    def data_collator(samples):
+        collated.append(len(samples))
+        return torch.utils.data.default_collate(samples)
+
+    processor = _make_processor()
+    processor.data_collator = data_collator
+    batches = _batches(processor.create_dataloader())
+
+    assert collated == [16] * NUM_BATCHES
+    for batch in batches:
+        assert batch["input_ids"].shape == (16, 128)
+
+
+@pytest.mark.parametrize("num_workers", [0, 2])
+def test_dataloader_kwargs_match_base(num_workers):
+    processor = _make_processor(num_workers=num_workers)
+    kwargs = processor._get_dataloader_kwargs()
+    expected = GenericDataProcessor._get_dataloader_kwargs(processor)
+
+    # only batching is overridden
+    assert kwargs.keys() == expected.keys()
+    for key in expected.keys() - {"sampler", "batch_size", "drop_last"}:
+        assert kwargs[key] == expected[key]
+    assert kwargs["batch_size"] is None
+    assert kwargs["sampler"].sampler is expected["sampler"]
@@ -20,9 +20,7 @@ def set_attention_kernel(params):
     :return:
     '''
 
-    params["model"]["attention_kernel"] = params["model"].get(
-        "attention_kernel", "default"
-    )
+    params["model"].setdefault("attention_kernel", "default")
 
     # Attention softmax is fp32 by default.
     params["model"]["attention_softmax_fp32"] = True
@@ -41,45 +39,24 @@ def set_defaults(params):
     Args:
         params: The dictionary containing the params
     """
+    model_params = params["model"]
     if params["train_input"]["data_processor"] == "Gpt2SyntheticDataProcessor":
-        if "train_input" in params:
-            params["train_input"]["vocab_size"] = params["train_input"].get(
-                "vocab_size", params["model"]["vocab_size"]
+        for input_key in ["train_input", "eval_input"]:
+            if input_key not in params:
+                continue
+            input_params = params[input_key]
+            vocab_size = input_params.setdefault(
+                "vocab_size", model_params["vocab_size"]
             )
             assert (
-                params["train_input"]["vocab_size"]
-                == params["model"]["vocab_size"]
-            ), f"Found different vocab_size in train_input ({params['train_input']['vocab_size']}) vs. model ({params['model']['vocab_size']})"
-            params["train_input"]["max_sequence_length"] = params[
-                "train_input"
-            ].get(
-                "max_sequence_length",
-                params["model"]["max_position_embeddings"],
+                vocab_size == model_params["vocab_size"]
+            ), f"Found different vocab_size in {input_key} ({vocab_size}) vs. model ({model_params['vocab_size']})"
+            input_params.setdefault(
+                "max_sequence_length", model_params["max_position_embeddings"],
             )
 
-        if "eval_input" in params:
-            params["eval_input"]["vocab_size"] = params["eval_input"].get(
-                "vocab_size", params["model"]["vocab_size"]
-            )
-            assert (
-                params["eval_input"]["vocab_size"]
-                == params["model"]["vocab_size"]
-            ), f"Found different vocab_size in eval_input ({params['eval_input']['vocab_size']}) vs. model ({params['model']['vocab_size']})"
-            params["eval_input"]["max_sequence_length"] = params[
-                "eval_input"
-            ].get(
-                "max_sequence_length",
-                params["model"]["max_position_embeddings"],
-            )
-
-    params["model"]["use_bfloat16"] = params["model"].get("use_bfloat16", True)
-    params["optimizer"]["loss_scaling_factor"] = params["optimizer"].get(
-        "loss_scaling_factor", 1.0
-    )
-    params["optimizer"]["log_summaries"] = params["optimizer"].get(
-        "log_summaries", False
-    )
-    params["runconfig"]["precision_opt_level"] = params["runconfig"].get(
-        "precision_opt_level", 1
-    )
+    model_params.setdefault("use_bfloat16", True)
+    params["optimizer"].setdefault("loss_scaling_factor", 1.0)
+    params["optimizer"].setdefault("log_summaries", False)
+    params["runconfig"].setdefault("precision_opt_level", 1)
     set_attention_kernel(params)
@@ -185,14 +185,15 @@ class GPTJModel(nn.Module):
         input_embedding = self.get_input_embeddings()
         output_embedding.weight = input_embedding.weight
 
-        if getattr(output_embedding, "bias", None) is not None:
+        bias = getattr(output_embedding, "bias", None)
+        # Only reallocate the bias when its size differs from the tied weight
+        if (
+            bias is not None
+            and bias.shape[0] != output_embedding.weight.shape[0]
+        ):
             output_embedding.bias.data = nn.functional.pad(
-                output_embedding.bias.data,
-                (
-                    0,
-                    output_embedding.weight.shape[0]
-                    - output_embedding.bias.shape[0],
-                ),
+                bias.data,
+                (0, output_embedding.weight.shape[0] - bias.shape[0]),
                 "constant",
                 0,
             )
@@ -20,23 +20,22 @@ def set_defaults(params):
     Args:
         params: The dictionary containing the params
     """
-    params["model"]["src_max_position_embeddings"] = params["model"].get(
+    model_params = params["model"]
+    train_input_params = params["train_input"]
+    optimizer_params = params["optimizer"]
+    model_params.setdefault(
         "src_max_position_embeddings",
-        params["train_input"]["src_max_sequence_length"],
+        train_input_params["src_max_sequence_length"],
     )
-    params["model"]["tgt_max_position_embeddings"] = params["model"].get(
+    model_params.setdefault(
         "tgt_max_position_embeddings",
-        params["train_input"]["tgt_max_sequence_length"],
-    )
-    params["model"]["use_bfloat16"] = params["model"].get("use_bfloat16", False)
-    params["optimizer"]["loss_scaling_factor"] = params["optimizer"].get(
-        "loss_scaling_factor", "dynamic"
-    )
-    params["optimizer"]["log_summaries"] = params["optimizer"].get(
-        "log_summaries", False
+        train_input_params["tgt_max_sequence_length"],
     )
+    model_params.setdefault("use_bfloat16", False)
+    optimizer_params.setdefault("loss_scaling_factor", "dynamic")
+    optimizer_params.setdefault("log_summaries", False)
 
-    params["train_input"]["dynamic_loss_weight"] = (
-        params["model"].get("mlm_loss_scaling", "batch_size")
+    train_input_params["dynamic_loss_weight"] = (
+        model_params.get("mlm_loss_scaling", "batch_size")
         == "precomputed_num_masked"
     )
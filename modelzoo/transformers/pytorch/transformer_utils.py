@@ -98,7 +98,10 @@ def build_broadcastable_attention_mask(
 
     Returns:
         The attention mask of shape [batch_size, num_heads, src_seq_len, target_seq_len],
-        with broadcast dimensions set to 1.
+        with broadcast dimensions set to 1. If `build_causal` is enabled, the
+        returned mask is a read-only broadcast view of a single
+        [src_seq_len, target_seq_len] tensor, so it must not be modified in
+        place. Call `.contiguous()` on it first if that is needed.
     """
 
     assert len(attention_mask.shape) in [
@@ -132,6 +135,12 @@ def build_broadcastable_attention_mask(
             dtype=dtype,
             device=device,
         )
+        if multiply_neg_inf:
+            # Scale the 2D causal mask before broadcasting it, so the
+            # returned mask is a view of a single [src, target] tensor rather
+            # than a materialized [batch_size, 1, src, target] one.
+            causal_mask = causal_mask * torch.finfo(causal_mask.dtype).min
+            multiply_neg_inf = False
         extended_attention_mask, _ = torch.broadcast_tensors(
             causal_mask, extended_attention_mask
         )
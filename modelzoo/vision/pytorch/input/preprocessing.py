@@ -12,32 +12,118 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import logging
 
 import torch
 from torchvision.transforms import transforms
 
-from modelzoo.vision.pytorch.input.transforms import create_transform
+from modelzoo.vision.pytorch.input.transforms import (
+    LambdaWithParam,
+    create_transform,
+)
+
+
+# Composed transforms, keyed by a hashable form of the transform specs and the
+# mixed precision type. Building and logging a transform is repeated by every
+# dataloader worker and epoch that calls `get_preprocess_transform`. Callers
+# with equal configs get the same transform object back.
+_TRANSFORM_CACHE = {}
+
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
 
 
 def get_preprocess_transform(params):
+    """
+    Returns the composed transform configured by `params["transforms"]`,
+    followed by a cast to the mixed precision type.
 
+    Transforms are cached per process, so callers whose transform specs and
+    mixed precision settings are equal share the same `Compose` object, and
+    with it any state held by its transforms. Callers that need to modify or
+    hold state in the returned transform must copy it first. Specs containing
+    unhashable values are not cached and always build a new transform.
+    """
     transform_specs = params["transforms"]
 
-    transform_list = []
-    for spec in transform_specs:
-        transform = create_transform(spec)
-        transform_list.append(transform)
-
     if params["mixed_precision"]:
         mp_type = torch.bfloat16 if params["use_bfloat16"] else torch.float16
     else:
         mp_type = torch.float32
 
-    transform_list.append(
-        create_transform({"name": "to_dtype", "mp_type": mp_type})
+    key = (_freeze(transform_specs), mp_type)
+    try:
+        transform = _TRANSFORM_CACHE.get(key)
+    except TypeError:
+        # Specs with unhashable values aren't cached.
+        key, transform = None, None
+    if transform is None:
+        # `create_transform` updates specs in place, which would change the
+        # key of the next lookup.
+        transform = _create_preprocess_transform(
+            copy.deepcopy(transform_specs), mp_type
+        )
+        if key is not None:
+            _TRANSFORM_CACHE[key] = transform
+    return transform
+
+
+def _normalize_to_dtype(x, mean, std, mp_type, *args, **kwargs):
+    """
+    Normalize a tensor image with mean and standard deviation and cast it to
+    `mp_type`. The cast is fused into the division, which saves a separate
+    pass over the image compared to `Normalize` followed by `to_dtype`.
+    """
+    mean = torch.as_tensor(mean, dtype=x.dtype, device=x.device)
+    std = torch.as_tensor(std, dtype=x.dtype, device=x.device)
+    if (std == 0).any():
+        raise ValueError(
+            f"std evaluated to zero after conversion to {x.dtype}, leading to "
+            f"division by zero."
+        )
+    if mean.ndim == 1:
+        mean = mean.view(-1, 1, 1)
+    if std.ndim == 1:
+        std = std.view(-1, 1, 1)
+    out = torch.empty(x.shape, dtype=mp_type, device=x.device)
+    return torch.div(x - mean, std, out=out)
+
+
+def _create_preprocess_transform(transform_specs, mp_type):
+    # Fuse the dtype cast into a final normalization, saving a pass over
+    # every image. An in-place normalization has to update its input, so it
+    # is kept as is.
+    fuse_normalize = (
+        transform_specs
+        and transform_specs[-1]["name"].lower() == "normalize"
+        and not transform_specs[-1].get("inplace", False)
     )
 
+    transform_list = []
+    for spec in transform_specs[:-1] if fuse_normalize else transform_specs:
+        transform = create_transform(spec)
+        transform_list.append(transform)
+
+    if fuse_normalize:
+        transform_list.append(
+            LambdaWithParam(
+                _normalize_to_dtype,
+                transform_specs[-1].get("mean"),
+                transform_specs[-1].get("std"),
+                mp_type,
+            )
+        )
+    else:
+        transform_list.append(
+            create_transform({"name": "to_dtype", "mp_type": mp_type})
+        )
+
     transform = transforms.Compose(transform_list)
 
     logging.info(
@@ -0,0 +1,161 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the composed vision preprocessing transform."""
+
+import numpy as np
+import pytest
+import torch
+from torchvision.transforms import transforms
+
+from modelzoo.vision.pytorch.input import preprocessing
+from modelzoo.vision.pytorch.input.transforms import SUPPORTED_TRANSFORMS
+
+MEAN = [0.485, 0.456, 0.406]
+STD = [0.229, 0.224, 0.225]
+
+
+def _params(transform_specs, mp_type):
+    return {
+        "transforms": transform_specs,
+        "mixed_precision": mp_type != torch.float32,
+        "use_bfloat16": mp_type == torch.bfloat16,
+    }
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    preprocessing._TRANSFORM_CACHE.clear()
+    yield
+    preprocessing._TRANSFORM_CACHE.clear()
+
+
+@pytest.mark.parametrize(
+    "mp_type", [torch.float32, torch.float16, torch.bfloat16]
+)
+def test_fused_normalize_matches_normalize_then_cast(mp_type):
+    spec = {"name": "normalize", "mean": MEAN, "std": STD}
+    transform = preprocessing.get_preprocess_transform(
+        _params([{"name": "center_crop", "size": 6}, spec], mp_type)
+    )
+    assert not any(
+        isinstance(t, transforms.Normalize) for t in transform.transforms
+    )
+
+    image = torch.rand(3, 8, 10, generator=torch.Generator().manual_seed(0))
+    original = image.clone()
+    expected = transforms.Normalize(MEAN, STD)(
+        transforms.CenterCrop(6)(image)
+    ).to(mp_type)
+
+    out = transform(image)
+    assert out.dtype == mp_type
+    torch.testing.assert_close(out, expected, rtol=0, atol=0)
+    torch.testing.assert_close(image, original, rtol=0, atol=0)
+
+
+def test_inplace_normalize_isnt_fused():
+    spec = {"name": "normalize", "mean": MEAN, "std": STD, "inplace": True}
+    transform = preprocessing.get_preprocess_transform(
+        _params([spec], torch.float16)
+    )
+    assert isinstance(transform.transforms[0], transforms.Normalize)
+    assert transform.transforms[0].inplace
+
+    image = torch.rand(3, 4, 4, generator=torch.Generator().manual_seed(0))
+    expected = transforms.Normalize(MEAN, STD)(image).to(torch.float16)
+    out = transform(image)
+    torch.testing.assert_close(out, expected, rtol=0, atol=0)
+    # the normalization is applied to the input, as configured
+    torch.testing.assert_close(image.to(torch.float16), out, rtol=0, atol=0)
+
+
+def test_fused_normalize_rejects_zero_std():
+    spec = {"name": "normalize", "mean": MEAN, "std": [1.0, 0.0, 1.0]}
+    transform = preprocessing.get_preprocess_transform(
+        _params([spec], torch.float32)
+    )
+    with pytest.raises(ValueError, match="division by zero"):
+        transform(torch.rand(3, 4, 4))
+
+
+def test_fused_normalize_isnt_a_configurable_transform():
+    assert "normalize_to_dtype" not in SUPPORTED_TRANSFORMS
+
+
+def test_cache_hit():
+    specs = [
+        {"name": "resize", "size": [4, 4], "interpolation": "bilinear"},
+        {"name": "normalize", "mean": MEAN, "std": STD},
+    ]
+    transform = preprocessing.get_preprocess_transform(
+        _params(specs, torch.float16)
+    )
+    # the specs are left untouched, so that the same params hit the cache
+    assert specs[0]["interpolation"] == "bilinear"
+    assert (
+        preprocessing.get_preprocess_transform(_params(specs, torch.float16))
+        is transform
+    )
+    # equal specs built independently share the transform
+    equal_specs = [
+        {"interpolation": "bilinear", "size": [4, 4], "name": "resize"},
+        {"name": "normalize", "mean": list(MEAN), "std": tuple(STD)},
+    ]
+    assert (
+        preprocessing.get_preprocess_transform(
+            _params(equal_specs, torch.float16)
+        )
+        is transform
+    )
+    assert len(preprocessing._TRANSFORM_CACHE) == 1
+
+
+def test_cache_miss():
+    specs = [{"name": "normalize", "mean": MEAN, "std": STD}]
+    transform = preprocessing.get_preprocess_transform(
+        _params(specs, torch.float16)
+    )
+    other_type = preprocessing.get_preprocess_transform(
+        _params(specs, torch.bfloat16)
+    )
+    other_specs = preprocessing.get_preprocess_transform(
+        _params(
+            [{"name": "normalize", "mean": STD, "std": MEAN}], torch.float16
+        )
+    )
+    assert other_type is not transform
+    assert other_specs is not transform
+    assert other_specs is not other_type
+    assert len(preprocessing._TRANSFORM_CACHE) == 3
+
+
+def test_unhashable_specs_arent_cached():
+    specs = [{"name": "normalize", "mean": np.array(MEAN), "std": STD}]
+    transform = preprocessing.get_preprocess_transform(
+        _params(specs, torch.float32)
+    )
+    assert not preprocessing._TRANSFORM_CACHE
+    assert (
+        preprocessing.get_preprocess_transform(_params(specs, torch.float32))
+        is not transform
+    )
+
+    image = torch.rand(3, 4, 4, generator=torch.Generator().manual_seed(0))
+    torch.testing.assert_close(
+        transform(image),
+        transforms.Normalize(MEAN, STD)(image),
+        rtol=0,
+        atol=0,
+    )
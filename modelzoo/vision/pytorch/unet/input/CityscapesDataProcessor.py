@@ -23,6 +23,22 @@ from modelzoo.vision.pytorch.unet.input.UNetDataProcessor import (
 )
 
 
+# Refer to :
+# https://github.com/mcordts/cityscapesScripts/blob/master/cityscapesscripts/helpers/labels.py#L56-L99
+# Mapping all classes with `ignoreInEval`=True(from above link)
+# to background class with id 0
+# fmt: off
+_LABEL_ID_LOOKUP_TABLE = torch.tensor([
+    0, 0, 0, 0, 0, 0, 0, 1, 2, 0,
+    0, 3, 4, 5, 0, 0, 0, 6, 0, 7,
+    8, 9, 10, 11, 12, 13, 14, 15,
+    16, 0, 0, 17, 18, 19,
+    ],
+    dtype=torch.uint8,
+)
+# fmt: on
+
+
 class Cityscapes(datasets.Cityscapes):
     """Wrapper around torchvision.datasets.Cityscapes with sorted files for reproducibility
     """
@@ -89,58 +105,19 @@ class CityscapesDataProcessor(UNetDataProcessor):
         return dataset
 
     def preprocess_mask(self, mask):
-
-        # Refer to :
-        # https://github.com/mcordts/cityscapesScripts/blob/master/cityscapesscripts/helpers/labels.py#L56-L99
-        # Mapping all classes with `ignoreInEval`=True(from above link)
-        # to background class with id 0
-
-        def lookup_table(mask):
-            # fmt: off
-            lut = torch.tensor([
-                0, 0, 0, 0, 0, 0, 0, 1, 2, 0,
-                0, 3, 4, 5, 0, 0, 0, 6, 0, 7,
-                8, 9, 10, 11, 12, 13, 14, 15,
-                16, 0, 0, 17, 18, 19,
-                ],
-                dtype=torch.uint8,
+        # Transforms are applied as straight-line calls, like in
+        # `preprocess_image`, rather than through a per-sample `Compose` of
+        # `Lambda`s. The resize transform is built once, on first use.
+        if not hasattr(self, "_mask_resize_transform"):
+            self._mask_resize_transform = transforms.Resize(
+                [self.tgt_image_height, self.tgt_image_width],
+                interpolation=transforms.InterpolationMode.NEAREST,
             )
-            # fmt: on
-            return lut[mask]
-
-        # Resize
-        resize_pil_transform = transforms.Resize(
-            [self.tgt_image_height, self.tgt_image_width],
-            interpolation=transforms.InterpolationMode.NEAREST,
-        )
 
+        mask = self._mask_resize_transform(mask)
         # converts to (C, H, W) format.
-        to_tensor_transform = transforms.PILToTensor()
-
-        # Convert to long for lookup
-        convert_to_long_transform = transforms.Lambda(
-            lambda x: x.to(torch.long)
-        )
-
+        mask = transforms.functional.pil_to_tensor(mask)
         # Map target ids based on lookup table
-        lookup_table_transform = transforms.Lambda(lambda x: lookup_table(x))
-
-        # Convert to mp type
-        convert_to_mp_type_transform = transforms.Lambda(
-            lambda x: x.to(self.mp_type)
-        )
-
-        tile_transform = self.get_tile_transform()
-
-        transforms_list = [
-            resize_pil_transform,
-            to_tensor_transform,
-            convert_to_long_transform,
-            lookup_table_transform,
-            convert_to_mp_type_transform,
-            tile_transform,
-        ]
-
-        mask = transforms.Compose(transforms_list)(mask)
-
-        return mask
+        mask = _LABEL_ID_LOOKUP_TABLE[mask.to(torch.long)]
+        mask = mask.to(self.mp_type)
+        return self.get_tile_transform()(mask)
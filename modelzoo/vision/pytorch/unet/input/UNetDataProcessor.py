@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import matplotlib.pyplot as plt
+import functools
+import os
+
+import numpy as np
 import torch
 from torchvision import transforms
 
@@ -24,10 +27,9 @@ from modelzoo.vision.pytorch.input.utils import (
     task_id,
 )
 from modelzoo.vision.pytorch.unet.input.preprocessing_utils import (
+    TileImageTransform,
     adjust_brightness_transform,
     normalize_tensor_transform,
-    rotation_90_transform,
-    tile_image_transform,
 )
 
 
@@ -45,6 +47,12 @@ class UNetDataProcessor:
             torch.manual_seed(self.shuffle_seed)
 
         self.augment_data = params.get("augment_data", True)
+        # Apply augmentations to whole batches in the collate function rather
+        # than to each sample in the dataset.
+        self.augment_in_collate = params.get("augment_in_collate", False)
+        # Per-process RNG for per-sample augmentations, see `_get_rng`.
+        self._rng = None
+        self._rng_pid = None
         self.batch_size = get_streaming_batch_size(params["batch_size"])
         self.shuffle = params.get("shuffle", True)
 
@@ -112,6 +120,10 @@ class UNetDataProcessor:
             dataloader_fn = torch.utils.data.DataLoader
             print("-- Using torch.utils.data.DataLoader -- ")
 
+        collate_fn = None
+        if self.augment_data and self.augment_in_collate:
+            collate_fn = self.collate_and_augment
+
         if self.num_workers:
             dataloader = dataloader_fn(
                 dataset,
@@ -122,6 +134,7 @@ class UNetDataProcessor:
                 drop_last=self.drop_last,
                 generator=generator_fn,
                 sampler=data_sampler,
+                collate_fn=collate_fn,
             )
         else:
             dataloader = dataloader_fn(
@@ -130,6 +143,7 @@ class UNetDataProcessor:
                 drop_last=self.drop_last,
                 generator=generator_fn,
                 sampler=data_sampler,
+                collate_fn=collate_fn,
             )
         return dataloader
 
@@ -137,29 +151,29 @@ class UNetDataProcessor:
         image = self.preprocess_image(image)
         mask = self.preprocess_mask(mask)
 
-        if self.augment_data:
-            do_horizontal_flip = torch.rand(size=(1,)).item() > 0.5
+        if self.augment_data and not self.augment_in_collate:
+            rng = self._get_rng()
+            do_horizontal_flip = rng.random() > 0.5
             # n_rots in range [0, 3)
-            n_rotations = torch.randint(low=0, high=3, size=(1,)).item()
+            n_rotations = int(rng.integers(low=0, high=3))
 
             if self.tgt_image_height != self.tgt_image_width:
                 # For a rectangle image
                 n_rotations = n_rotations * 2
 
-            augment_transform_image = self.get_augment_transforms(
+            image = self.apply_augment(
+                image,
                 do_horizontal_flip=do_horizontal_flip,
                 n_rotations=n_rotations,
                 do_random_brightness=True,
             )
-            augment_transform_mask = self.get_augment_transforms(
+            mask = self.apply_augment(
+                mask,
                 do_horizontal_flip=do_horizontal_flip,
                 n_rotations=n_rotations,
                 do_random_brightness=False,
             )
 
-            image = augment_transform_image(image)
-            mask = augment_transform_mask(mask)
-
         # Handle dtypes and mask shapes based on `loss_type`
         # and `mixed_precsion`
 
@@ -167,17 +181,15 @@ class UNetDataProcessor:
             mask = mask.to(self.mp_type)
         elif self.loss_type == "multilabel_bce":
             mask = torch.squeeze(mask, 0)
-            # Only long tensors are accepted by one_hot fcn.
+            # Only long tensors are accepted as scatter indices.
             mask = mask.to(torch.long)
 
-            # out shape: ((D), H, W, num_classes)
-            mask = torch.nn.functional.one_hot(
-                mask, num_classes=self.num_classes
-            )
+            # One-hot encode directly into the final layout and dtype.
             # out shape: (num_classes, (D), H, W)
-            mask_axes = [_ for _ in range(len(mask.shape))]
-            mask = torch.permute(mask, mask_axes[-1:] + mask_axes[0:-1])
-            mask = mask.to(self.mp_type)
+            one_hot_mask = torch.zeros(
+                (self.num_classes, *mask.shape), dtype=self.mp_type
+            )
+            mask = one_hot_mask.scatter_(0, mask.unsqueeze(0), 1)
 
         elif self.loss_type == "ssce":
             # out shape: ((D), H, W) with each value in [0, num_classes)
@@ -189,63 +201,98 @@ class UNetDataProcessor:
 
         return image, mask
 
+    def _get_rng(self):
+        """
+        Returns a numpy generator for per-sample augmentation draws, which are
+        much cheaper than drawing one-element torch tensors. The generator is
+        created lazily in each process, i.e. in each dataloader worker, and
+        seeded from the torch seed of that process, which is unique per worker
+        and derived from `shuffle_seed` when it is set.
+        """
+        if self._rng is None or self._rng_pid != os.getpid():
+            self._rng = np.random.default_rng(torch.initial_seed())
+            self._rng_pid = os.getpid()
+        return self._rng
+
     def preprocess_image(self, image):
+        # Transforms are applied as straight-line calls rather than through a
+        # per-sample `Compose` of `Lambda`s. The resize transform is built
+        # once, on first use, since the target shape is set by subclasses.
+        if not hasattr(self, "_resize_transform"):
+            self._resize_transform = transforms.Resize(
+                [self.tgt_image_height, self.tgt_image_width],
+                interpolation=transforms.InterpolationMode.BICUBIC,
+                antialias=True,
+            )
 
         # converts to (C, (D), H, W) format.
-        to_tensor_transform = transforms.PILToTensor()
-
-        # Resize and convert to torch.Tensor
-        resize_pil_transform = transforms.Resize(
-            [self.tgt_image_height, self.tgt_image_width],
-            interpolation=transforms.InterpolationMode.BICUBIC,
-            antialias=True,
-        )
+        image = transforms.functional.pil_to_tensor(image)
+        image = self._resize_transform(image)
         # Tiling when image shape qualifies
-        tile_transform = self.get_tile_transform()
-
-        # Normalize
-        normalize_transform = transforms.Lambda(
-            lambda x: normalize_tensor_transform(
-                x, normalize_data_method=self.normalize_data_method
-            )
+        image = self.get_tile_transform()(image)
+        image = normalize_tensor_transform(
+            image, normalize_data_method=self.normalize_data_method
         )
-        transforms_list = [
-            to_tensor_transform,
-            resize_pil_transform,
-            tile_transform,
-            normalize_transform,
-        ]
-        image = transforms.Compose(transforms_list)(image)
         return image
 
     def preprocess_mask(self, mask):
         tile_transform = self.get_tile_transform()
         return tile_transform(mask)
 
-    def get_augment_transforms(
-        self, do_horizontal_flip, n_rotations, do_random_brightness
+    def apply_augment(
+        self, x, do_horizontal_flip, n_rotations, do_random_brightness
     ):
-
-        augment_transforms_list = []
         if do_horizontal_flip:
-            horizontal_flip_transform = transforms.Lambda(
-                lambda x: transforms.functional.hflip(x)
-            )
-            augment_transforms_list.append(horizontal_flip_transform)
-
+            x = torch.flip(x, dims=[-1])
         if n_rotations > 0:
-            rotation_transform = transforms.Lambda(
-                lambda x: rotation_90_transform(x, num_rotations=n_rotations)
-            )
-            augment_transforms_list.append(rotation_transform)
-
+            # Rotate in counter-clockwise direction along H, W
+            x = torch.rot90(x, k=n_rotations, dims=[-2, -1])
         if do_random_brightness:
-            brightness_transform = transforms.Lambda(
-                lambda x: adjust_brightness_transform(x, p=0.5, delta=0.2)
-            )
-            augment_transforms_list.append(brightness_transform)
+            x = adjust_brightness_transform(x, p=0.5, delta=0.2)
+        return x
+
+    def apply_batch_augment(self, x, do_horizontal_flip, n_rotations):
+        # Per-sample flags of shape (B,) are broadcast over the batch.
+        flip = do_horizontal_flip.view(-1, *([1] * (x.dim() - 1)))
+        x = torch.where(flip, torch.flip(x, dims=[-1]), x)
+        for k in torch.unique(n_rotations).tolist():
+            if k % 4:
+                # Rotate in counter-clockwise direction along H, W
+                rotate = n_rotations == k
+                x[rotate] = torch.rot90(x[rotate], k=k, dims=[-2, -1])
+        return x
+
+    def collate_and_augment(self, batch):
+        images, masks = torch.utils.data.default_collate(batch)
+        batch_size = images.shape[0]
+
+        do_horizontal_flip = torch.rand(size=(batch_size,)) > 0.5
+        # n_rots in range [0, 3)
+        n_rotations = torch.randint(low=0, high=3, size=(batch_size,))
+        if self.tgt_image_height != self.tgt_image_width:
+            # For a rectangle image
+            n_rotations = n_rotations * 2
+
+        images = self.apply_batch_augment(
+            images, do_horizontal_flip, n_rotations
+        )
+        masks = self.apply_batch_augment(masks, do_horizontal_flip, n_rotations)
 
-        return transforms.Compose(augment_transforms_list)
+        # Same as `adjust_brightness_transform(p=0.5, delta=0.2)` per sample
+        do_brightness = torch.rand(size=(batch_size,)) > 0.5
+        delta = 0.2 * do_brightness.to(images.dtype)
+        images = images + delta.view(-1, *([1] * (images.dim() - 1)))
+        return images, masks
+
+    def get_augment_transforms(
+        self, do_horizontal_flip, n_rotations, do_random_brightness
+    ):
+        return functools.partial(
+            self.apply_augment,
+            do_horizontal_flip=do_horizontal_flip,
+            n_rotations=n_rotations,
+            do_random_brightness=do_random_brightness,
+        )
 
     @property
     def tiling_image_shape(self):
@@ -258,19 +305,17 @@ class UNetDataProcessor:
         return self._tiling_image_shape
 
     def get_tile_transform(self):
-        tiling_image_height, tiling_image_width = (
-            self.tiling_image_shape[0],
-            self.tiling_image_shape[1],
-        )
-        tile_transform = transforms.Lambda(
-            lambda x: tile_image_transform(
-                x, tiling_image_height, tiling_image_width
+        # Built once, on first use, since the tiling shape is set by subclasses.
+        if not hasattr(self, "_tile_transform"):
+            self._tile_transform = TileImageTransform(
+                self.tiling_image_shape[0], self.tiling_image_shape[1],
             )
-        )
-        return tile_transform
+        return self._tile_transform
 
 
 def visualize_dataset(dataset, num_samples=3):
+    import matplotlib.pyplot as plt
+
     figure = plt.figure(figsize=(10, 10))
     rows, cols = num_samples, 2
     for i in range(1, cols * rows + 1, 2):
@@ -169,3 +169,24 @@ def tile_image_transform(img, target_height, target_width):
         v_tiled_img, tgt_img_shape=tgt_img_shape, axis=2
     )
     return tiled_img
+
+
+class TileImageTransform:
+    """
+    Callable that tiles an image with `tile_image_transform`
+    :params target_height: int value representing output tiled image height
+    :params target_width: int value representing output tiled image width
+    """
+
+    def __init__(self, target_height, target_width):
+        self.target_height = target_height
+        self.target_width = target_width
+
+    def __call__(self, img):
+        return tile_image_transform(img, self.target_height, self.target_width)
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(target_height={self.target_height}, "
+            f"target_width={self.target_width})"
+        )
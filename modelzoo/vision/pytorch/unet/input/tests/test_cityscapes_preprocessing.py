@@ -0,0 +1,73 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the mask preprocessing of `CityscapesDataProcessor`."""
+
+import pickle
+
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+from torchvision import transforms
+
+pytest.importorskip("cerebras_pytorch")
+
+from modelzoo.vision.pytorch.unet.input.CityscapesDataProcessor import (
+    _LABEL_ID_LOOKUP_TABLE,
+    CityscapesDataProcessor,
+)
+
+
+def _make_processor(image_shape, mixed_precision):
+    return CityscapesDataProcessor(
+        {
+            "data_dir": "unused",
+            "num_classes": 20,
+            "loss": "ssce",
+            "batch_size": 2,
+            "use_worker_cache": False,
+            "image_shape": image_shape,
+            "mixed_precision": mixed_precision,
+            "use_bfloat16": True,
+        }
+    )
+
+
+@pytest.mark.parametrize("mixed_precision", [False, True])
+@pytest.mark.parametrize("image_shape", [[8, 12, 3], [16, 16, 3]])
+def test_preprocess_mask(image_shape, mixed_precision):
+    processor = _make_processor(image_shape, mixed_precision)
+    rng = np.random.default_rng(0)
+    mask = Image.fromarray(
+        rng.integers(0, len(_LABEL_ID_LOOKUP_TABLE), size=(10, 14)).astype(
+            np.uint8
+        )
+    )
+
+    expected = transforms.Resize(
+        image_shape[:2], interpolation=transforms.InterpolationMode.NEAREST
+    )(mask)
+    expected = transforms.functional.pil_to_tensor(expected).to(torch.long)
+    expected = _LABEL_ID_LOOKUP_TABLE[expected].to(processor.mp_type)
+
+    out = processor.preprocess_mask(mask)
+    assert out.dtype == processor.mp_type
+    torch.testing.assert_close(out, expected, rtol=0, atol=0)
+
+    # the processor holds no closures, so it can be sent to spawned workers
+    restored = pickle.loads(pickle.dumps(processor))
+    torch.testing.assert_close(
+        restored.preprocess_mask(mask), expected, rtol=0, atol=0
+    )
@@ -0,0 +1,233 @@
+# Copyright 2022 Cerebras Systems.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests that batch augmentation in the collate function matches the
+per-sample augmentation of `UNetDataProcessor`.
+"""
+
+import itertools
+
+import pytest
+import torch
+
+pytest.importorskip("cerebras_pytorch")
+
+from modelzoo.vision.pytorch.unet.input.UNetDataProcessor import (
+    UNetDataProcessor,
+)
+
+NUM_SAMPLES = 4000
+# 5 sigma of the frequency of an event of probability 1/2 over NUM_SAMPLES
+TOLERANCE = 5 * 0.5 / NUM_SAMPLES ** 0.5
+BRIGHTNESS_DELTA = 0.2
+
+
+def _make_processor(height, width, augment_in_collate):
+    processor = UNetDataProcessor(
+        {
+            "data_dir": "unused",
+            "num_classes": 1,
+            "loss": "bce",
+            "batch_size": 8,
+            "augment_data": True,
+            "augment_in_collate": augment_in_collate,
+        }
+    )
+    processor.tgt_image_height = height
+    processor.tgt_image_width = width
+    # images are passed in as tensors that are already preprocessed
+    processor.preprocess_image = lambda image: image
+    processor.preprocess_mask = lambda mask: mask
+    return processor
+
+
+def _make_image(height, width):
+    # distinct values, so that every flip and rotation is distinguishable
+    return torch.arange(height * width, dtype=torch.float32).view(
+        1, height, width
+    )
+
+
+def _n_rotations(processor):
+    """The numbers of rotations that the processor draws uniformly from."""
+    n_rotations = [0, 1, 2]
+    if processor.tgt_image_height != processor.tgt_image_width:
+        n_rotations = [2 * n for n in n_rotations]
+    return n_rotations
+
+
+def _candidates(processor, image):
+    """All (flip, rotations) augmentations that the processor can draw."""
+    return {
+        (flip, n): processor.apply_augment(image, flip, n, False)
+        for flip, n in itertools.product([False, True], _n_rotations(processor))
+    }
+
+
+def _expected_rotations(processor, image):
+    """Expected frequency of each rotation as decoded by `_decode`, which
+    decodes rotations that give the same image (e.g. 0 and 4) as the first.
+    """
+    expected = {}
+    for n in _n_rotations(processor):
+        rotated = processor.apply_augment(image, False, n, False)
+        for m in _n_rotations(processor):
+            if torch.equal(
+                rotated, processor.apply_augment(image, False, m, False)
+            ):
+                expected[m] = expected.get(m, 0) + 1 / 3
+                break
+    return expected
+
+
+def _decode(candidates, image, mask):
+    """Returns the augmentation applied to `image` and `mask`."""
+    brightness = image.flatten()[0] - image.flatten()[0].floor()
+    assert torch.allclose(
+        brightness, torch.tensor(0.0), atol=1e-5
+    ) or torch.allclose(brightness, torch.tensor(BRIGHTNESS_DELTA), atol=1e-5)
+    for key, expected in candidates.items():
+        if expected.shape == mask.shape and torch.equal(mask, expected):
+            # images and masks must get the same flip and rotation
+            torch.testing.assert_close(image - brightness, expected)
+            return key, bool(brightness > 0.1)
+    raise AssertionError(f"Unexpected augmentation of {image}")
+
+
+def _frequencies(draws):
+    flips = sum(flip for (flip, _), _ in draws) / len(draws)
+    rotations = {}
+    for (_, n), _ in draws:
+        rotations[n] = rotations.get(n, 0) + 1 / len(draws)
+    brightness = sum(bright for _, bright in draws) / len(draws)
+    return flips, rotations, brightness
+
+
+@pytest.mark.parametrize("height, width", [(2, 2), (2, 3)])
+def test_apply_batch_augment_matches_apply_augment(height, width):
+    processor = _make_processor(height, width, augment_in_collate=True)
+    image = _make_image(height, width)
+    keys = list(_candidates(processor, image))
+    batch = torch.stack([image + 100 * i for i in range(len(keys))])
+    do_horizontal_flip = torch.tensor([flip for flip, _ in keys])
+    n_rotations = torch.tensor([n for _, n in keys])
+
+    out = processor.apply_batch_augment(
+        batch.clone(), do_horizontal_flip, n_rotations
+    )
+    for x, y, (flip, n) in zip(batch, out, keys):
+        torch.testing.assert_close(
+            y, processor.apply_augment(x, flip, n, False), rtol=0, atol=0
+        )
+
+
+@pytest.mark.parametrize("height, width", [(2, 2), (2, 3)])
+def test_collate_and_augment_matches_per_sample_statistics(height, width):
+    image = _make_image(height, width)
+    mask = image.clone()
+
+    torch.manual_seed(0)
+    processor = _make_processor(height, width, augment_in_collate=False)
+    candidates = _candidates(processor, image)
+    per_sample = [
+        _decode(candidates, *processor.transform_image_and_mask(image, mask))
+        for _ in range(NUM_SAMPLES)
+    ]
+
+    processor = _make_processor(height, width, augment_in_collate=True)
+    samples = [
+        processor.transform_image_and_mask(image, mask)
+        for _ in range(NUM_SAMPLES)
+    ]
+    # the dataset doesn't augment when augmenting in the collate function
+    for x, y in samples[:10]:
+        torch.testing.assert_close(x, image, rtol=0, atol=0)
+        torch.testing.assert_close(y, mask, rtol=0, atol=0)
+    images, masks = processor.collate_and_augment(samples)
+    batched = [_decode(candidates, x, y) for x, y in zip(images, masks)]
+
+    flips, rotations, brightness = _frequencies(per_sample)
+    batch_flips, batch_rotations, batch_brightness = _frequencies(batched)
+    assert abs(flips - 0.5) < TOLERANCE
+    assert abs(batch_flips - 0.5) < TOLERANCE
+    assert abs(brightness - 0.5) < TOLERANCE
+    assert abs(batch_brightness - 0.5) < TOLERANCE
+    expected_rotations = _expected_rotations(processor, image)
+    assert rotations.keys() == expected_rotations.keys()
+    assert batch_rotations.keys() == expected_rotations.keys()
+    for n, expected in expected_rotations.items():
+        assert abs(rotations[n] - expected) < TOLERANCE
+        assert abs(batch_rotations[n] - expected) < TOLERANCE
+
+
+def test_collate_and_augment_uses_same_draws_for_masks():
+    processor = _make_processor(4, 4, augment_in_collate=True)
+    images = torch.rand(64, 3, 4, 4, generator=torch.Generator().manual_seed(0))
+    # the mask of each sample is the first channel of its image
+    masks = images[:, :1].clone()
+
+    torch.manual_seed(0)
+    out_images, out_masks = processor.collate_and_augment(
+        list(zip(images, masks))
+    )
+    offsets = out_images[:, :1] - out_masks
+    for offset in offsets:
+        # the brightness offset is the only difference
+        assert torch.allclose(offset, offset.flatten()[0].expand_as(offset))
+        assert torch.isclose(
+            offset.flatten()[0], torch.tensor(0.0), atol=1e-6
+        ) or torch.isclose(
+            offset.flatten()[0], torch.tensor(BRIGHTNESS_DELTA), atol=1e-6
+        )
+
+
+class _RngDataset(torch.utils.data.Dataset):
+    def __init__(self, processor):
+        self.processor = processor
+
+    def __len__(self):
+        return 8
+
+    def __getitem__(self, i):
+        worker_info = torch.utils.data.get_worker_info()
+        draws = self.processor._get_rng().integers(0, 2 ** 62, size=4)
+        return worker_info.id, torch.from_numpy(draws)
+
+
+def _rng_draws(processor, seed):
+    loader = torch.utils.data.DataLoader(
+        _RngDataset(processor),
+        batch_size=None,
+        num_workers=2,
+        generator=torch.Generator().manual_seed(seed),
+    )
+    draws = {}
+    for worker_id, x in loader:
+        draws.setdefault(worker_id, []).append(x)
+    return {k: torch.cat(v) for k, v in draws.items()}
+
+
+def test_rng_differs_per_worker():
+    processor = _make_processor(2, 2, augment_in_collate=False)
+    # the rng of the main process isn't inherited by the workers
+    processor._get_rng()
+
+    draws = _rng_draws(processor, seed=0)
+    assert draws.keys() == {0, 1}
+    assert not torch.equal(draws[0], draws[1])
+
+    # workers are seeded from the dataloader generator
+    for worker_id, x in _rng_draws(processor, seed=0).items():
+        torch.testing.assert_close(x, draws[worker_id], rtol=0, atol=0)
+    assert not torch.equal(_rng_draws(processor, seed=1)[0], draws[0])